@@ -1,20 +1,33 @@
 # Pattern 4: API Endpoints with Dependencies
 # - Route handlers with dependency injection
 # - Request validation, error handling, authorization checks
+# - Opt-in fast response serialization for trusted ORM output
+# - Streaming NDJSON/CSV export with its own session
 
 # -------------------------------------------------------------------
 # api/v1/endpoints/users.py
 # -------------------------------------------------------------------
-from fastapi import APIRouter, Depends, HTTPException, status
+import csv
+import io
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import AsyncIterator, Dict, List, Literal, Optional, Sequence
 
-from app.core.database import get_db
+from app.core.config import get_settings
+from app.core.database import ReadOnlySessionLocal, get_db
+from app.core.pagination import InvalidCursorError
+from app.core.serialization import FastJSONResponse, dumps, serializer_for
+from app.schemas.pagination import Page
 from app.schemas.user import User, UserCreate, UserUpdate
 from app.services.user_service import user_service
 from app.api.dependencies import get_current_user
 
 router = APIRouter()
+settings = get_settings()
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+MAX_BULK_USERS = 1000
 
 @router.post("/", response_model=User, status_code=status.HTTP_201_CREATED)
 async def create_user(
@@ -28,6 +41,86 @@ async def create_user(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/bulk", response_model=List[User], status_code=status.HTTP_201_CREATED)
+async def create_users(
+    users_in: List[UserCreate] = Body(..., max_length=MAX_BULK_USERS),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Create users in batches (multi-row INSERT per chunk).
+
+    Authenticated only, and capped at ``MAX_BULK_USERS`` per request:
+    every entry costs a bcrypt hash, so an open, unbounded body would let
+    one anonymous request burn minutes of CPU.
+    """
+    try:
+        return await user_service.create_users(db, users_in)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/", response_model=Page[User])
+async def list_users(
+    after: Optional[str] = Query(None, description="Opaque cursor from a previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+    order_by: Literal["id", "email"] = "id",
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """List users with keyset pagination (constant cost per page)."""
+    try:
+        items, next_cursor = await user_service.repository.get_page(
+            db, after=after, limit=limit, order_by=(order_by,)
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if settings.FAST_SERIALIZATION:
+        # Returning a Response skips response_model validation and encoding
+        return FastJSONResponse({
+            "items": serializer_for(User).to_dicts(items),
+            "next_cursor": next_cursor,
+        })
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/export")
+async def export_users(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    chunk_size: int = Query(1000, ge=100, le=10_000),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream all users as NDJSON or CSV in constant memory."""
+    return StreamingResponse(
+        _export_users(format, chunk_size),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
+
+async def _export_users(format: str, chunk_size: int) -> AsyncIterator[bytes]:
+    """Encode one chunk per server-side cursor partition.
+
+    The session is opened here rather than via ``Depends``, so it lives
+    exactly as long as the stream. The next partition is fetched only
+    after the server accepted the previous chunk, so a slow client slows
+    the cursor down instead of growing a buffer.
+    """
+    serializer = serializer_for(User)
+    if format == "csv":
+        yield _csv_lines([], serializer.keys, header=True)
+    async with ReadOnlySessionLocal() as db:
+        async for users in user_service.repository.stream_all(db, chunk_size):
+            rows = serializer.to_dicts(users)
+            if format == "csv":
+                yield _csv_lines(rows, serializer.keys)
+            else:
+                yield b"".join(dumps(row) + b"\n" for row in rows)
+
+def _csv_lines(rows: List[Dict], keys: Sequence[str], header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=keys)
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
 @router.get("/me", response_model=User)
 async def read_current_user(
     current_user: User = Depends(get_current_user)
@@ -45,6 +138,8 @@ async def read_user(
     user = await user_service.repository.get(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    if settings.FAST_SERIALIZATION:
+        return FastJSONResponse(serializer_for(User).to_dict(user))
     return user
 
 @router.patch("/{user_id}", response_model=User)
@@ -73,6 +168,106 @@ async def delete_user(
     if current_user.id != user_id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    deleted = await user_service.repository.delete(db, user_id)
+    deleted = await user_service.delete_user(db, user_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="User not found")
+
+
+# -------------------------------------------------------------------
+# schemas/pagination.py
+# -------------------------------------------------------------------
+from typing import Generic, List, Optional, TypeVar
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    """One page of a cursor-paginated listing."""
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+# -------------------------------------------------------------------
+# core/serialization.py
+# -------------------------------------------------------------------
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Dict, List, Sequence, Type, get_args
+
+import pydantic_core
+from pydantic import BaseModel, TypeAdapter
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # Optional dependency
+    orjson = None
+
+def dumps(content: Any) -> bytes:
+    """Encode JSON with orjson when installed, else pydantic-core (both in Rust).
+
+    Datetimes come out as pydantic writes them either way: ISO 8601, with
+    UTC spelled ``Z`` rather than ``+00:00``.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+        except TypeError:  # e.g. Decimal, ints beyond 64 bits
+            pass
+    return pydantic_core.to_json(content)
+
+class FastJSONResponse(Response):
+    """JSON response rendered by ``dumps`` (compact, no ``jsonable_encoder`` pass)."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def _has_nested_models(annotation: Any) -> bool:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return True
+    return any(_has_nested_models(arg) for arg in get_args(annotation))
+
+class FastSerializer:
+    """Precompiled serializer for one response schema.
+
+    For trusted input (ORM rows we loaded ourselves) ``to_dict`` copies
+    only the schema's fields by attribute access, without validation, so
+    extra columns such as ``hashed_password`` are never emitted, nor are
+    fields declared with ``Field(exclude=True)``. Values are not coerced
+    to the annotated types, so the row attributes must already match them.
+    Schemas with nested models go through a cached ``TypeAdapter``
+    instead, and ``validate_json`` is the fully validated path for
+    untrusted input.
+    """
+
+    def __init__(self, schema: Type[BaseModel]):
+        self.schema = schema
+        fields = {name: field for name, field in schema.model_fields.items() if not field.exclude}
+        self.keys = [field.serialization_alias or field.alias or name for name, field in fields.items()]
+        getter = attrgetter(*fields)
+        self._getter = getter if len(fields) > 1 else lambda obj: (getter(obj),)
+        self._trusted = not any(_has_nested_models(field.annotation) for field in fields.values())
+        self._adapter = TypeAdapter(List[schema])
+
+    def to_dict(self, obj: Any) -> Dict[str, Any]:
+        return self.to_dicts([obj])[0]
+
+    def to_dicts(self, objs: Sequence[Any]) -> List[Dict[str, Any]]:
+        if not self._trusted:
+            return self._adapter.dump_python(
+                self._adapter.validate_python(objs, from_attributes=True), mode="json", by_alias=True
+            )
+        keys, getter = self.keys, self._getter
+        return [dict(zip(keys, getter(obj))) for obj in objs]
+
+    def validate_json(self, objs: Sequence[Any]) -> bytes:
+        """Validate through the schema and encode (untrusted input)."""
+        return self._adapter.dump_json(
+            self._adapter.validate_python(objs, from_attributes=True), by_alias=True
+        )
+
+@lru_cache(maxsize=None)
+def serializer_for(schema: Type[BaseModel]) -> FastSerializer:
+    """One serializer per schema, built on first use."""
+    return FastSerializer(schema)
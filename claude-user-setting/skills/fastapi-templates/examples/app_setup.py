@@ -2,20 +2,55 @@
 # - Application entry point with lifespan
 # - Settings with pydantic-settings
 # - Async database session management
+# - Configurable, instrumented connection pool
+# - Per-request SQL statement counter with N+1 detection
+# - Read/write routing to replicas with read-your-writes stickiness
+# - Per-phase startup timing; DB engine and crypto libraries built lazily
+# - Background warm-up (bcrypt cost, pool, serializers, crypto, caches) gating /readyz
 
 # main.py
-from fastapi import FastAPI, Depends
+import asyncio
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 
+from app.core.config import get_settings
+from app.core.logging.logger import logger
+from app.core.security import HashingPoolSaturated, password_hash_pool
+from app.core.warmup import configure_password_hashing, startup_phase, warm_up
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
     # Startup
-    await database.connect()
+    settings = get_settings()
+    phases = app.state.startup_phases = {}
+    with startup_phase(phases, "database"):
+        await database.connect()
+
+    # With warm-up on, bcrypt (passlib import + calibration) is set up in the
+    # background instead, so it stays off the path to the first request
+    if not settings.WARMUP_ENABLED:
+        with startup_phase(phases, "bcrypt"):
+            app.state.bcrypt_rounds = await configure_password_hashing()
+    logger.info(
+        "[Startup] lifespan complete",
+        extra={
+            "startup_ms": round(sum(phases.values()), 1),
+            **{f"startup_{name}_ms": ms for name, ms in phases.items()},
+        },
+    )
+
+    # Serve liveness right away; /readyz turns 200 once warm-up is done
+    app.state.ready = not settings.WARMUP_ENABLED
+    warmup_task = asyncio.create_task(warm_up(app)) if settings.WARMUP_ENABLED else None
     yield
     # Shutdown
+    if warmup_task is not None:
+        warmup_task.cancel()
     await database.disconnect()
+    password_hash_pool.shutdown()
 
 app = FastAPI(
     title="API Template",
@@ -32,6 +67,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(HashingPoolSaturated)
+async def hashing_pool_saturated_handler(request: Request, exc: HashingPoolSaturated):
+    """Shed login/signup load instead of queueing unbounded bcrypt work."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server busy, retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz(request: Request):
+    """Readiness probe: 503 until the warm-up stage has finished."""
+    if not request.app.state.ready:
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
+    return {"status": "ready", "warmup_ms": getattr(request.app.state, "warmup_ms", 0)}
+
 # Include routers
 from app.api.v1.router import api_router
 app.include_router(api_router, prefix="/api/v1")
@@ -40,56 +91,620 @@ app.include_router(api_router, prefix="/api/v1")
 # -------------------------------------------------------------------
 # core/config.py
 # -------------------------------------------------------------------
+from typing import List, Optional
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
+class DatabaseConfig(BaseModel):
+    """Async engine / connection pool settings (per worker process).
+
+    Same model as ``DatabaseConfig`` in config.py, so ``_create_engine``
+    reads ``settings.database`` with either settings variant.
+    """
+    pool_size: int = Field(default=5, ge=1)
+    max_overflow: int = Field(default=10, ge=0)
+    pool_timeout: float = Field(default=30.0, gt=0)
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    pool_wait_warn_ms: float = Field(default=100.0, gt=0)
+    echo: bool = False
+
 class Settings(BaseSettings):
     """Application settings."""
     DATABASE_URL: str
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     API_V1_STR: str = "/api/v1"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 32
+    BCRYPT_TARGET_MS: int = 250
+    BCRYPT_MIN_ROUNDS: int = 10
+    BCRYPT_MAX_ROUNDS: int = 16
+    BCRYPT_ROUNDS: Optional[int] = None
+
+    # Verified bearer tokens cached per worker. Invalidation (password change,
+    # delete) only reaches the worker that made the write, so the TTL is how
+    # long other workers may still accept the old principal.
+    PRINCIPAL_CACHE_SIZE: int = 10_000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 5.0
+
+    # Connection pool (per worker process: total = workers * (size + overflow)),
+    # set from the environment as e.g. DATABASE__POOL_SIZE=20
+    database: DatabaseConfig = Field(default_factory=DatabaseConfig)
+
+    # Read replicas (same pool settings as the primary). Local setup with two
+    # SQLite files: copy app.db to replica.db, then in .env
+    #   DATABASE_URL=sqlite+aiosqlite:///./app.db
+    #   DATABASE_REPLICA_URLS=["sqlite+aiosqlite:///./replica.db"]
+    # Rows written after the copy show up on reads only once the request that
+    # wrote them is sticky to the primary, which makes routing easy to observe.
+    DATABASE_REPLICA_URLS: List[str] = []
+    DB_REPLICA_EJECT_SECONDS: float = 30.0
+
+    # Same SQL repeated this often in one request is flagged as a probable N+1;
+    # strict mode (for tests) fails the request instead.
+    SQL_N_PLUS_ONE_THRESHOLD: int = 10
+    SQL_N_PLUS_ONE_STRICT: bool = False
+
+    # Serialize trusted ORM output straight to JSON bytes, skipping
+    # response_model validation (see core/serialization.py)
+    FAST_SERIALIZATION: bool = False
+
+    # Background warm-up after startup; /readyz answers 503 until it ends.
+    # Pool connections are per engine (primary and each replica), capped
+    # at database.pool_size; cache rows are the newest users by ID.
+    WARMUP_ENABLED: bool = True
+    WARMUP_POOL_CONNECTIONS: int = 5
+    WARMUP_CACHE_ROWS: int = 1000
+    WARMUP_TIMEOUT: float = 30.0
 
     class Config:
         env_file = ".env"
+        env_nested_delimiter = "__"
 
 @lru_cache()
 def get_settings() -> Settings:
     return Settings()
 
 
+# -------------------------------------------------------------------
+# core/db_pool.py
+# -------------------------------------------------------------------
+import time
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.logging.logger import logger
+from app.core.metrics.histogram import LatencyHistogram, histogram_lines
+
+class PoolStats:
+    """Checkout wait histogram and slow-checkout counter for one pool."""
+
+    def __init__(self, wait_warn_ms: float = 100.0):
+        self.wait_warn_ms = wait_warn_ms
+        self.wait_histogram = LatencyHistogram()
+        self.slow_checkouts = 0
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that times every connection checkout.
+
+    The measured time covers waiting for a free connection and, for
+    overflow connections, opening a new one.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats  # Keep history across engine.dispose()
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            wait_ms = (time.perf_counter() - start) * 1000
+            self.stats.wait_histogram.observe(wait_ms)
+            if wait_ms > self.stats.wait_warn_ms:
+                self.stats.slow_checkouts += 1
+                logger.warning(
+                    f"[DB] Slow connection checkout (>{self.stats.wait_warn_ms:g}ms)",
+                    extra={"wait_ms": round(wait_ms), **pool_status(self)},
+                )
+
+def pool_status(pool: AsyncAdaptedQueuePool) -> dict:
+    """Live pool occupancy."""
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),  # Negative while below pool_size
+    }
+
+def pool_metrics_lines(name: str, engine: AsyncEngine) -> list:
+    """Prometheus gauges and checkout-wait histogram for an engine's pool."""
+    pool = engine.pool
+    labels = f'pool="{name}"'
+    lines = [
+        f"db_pool_{key}{{{labels}}} {value}"
+        for key, value in pool_status(pool).items()
+    ]
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        lines.append(f"db_pool_slow_checkouts_total{{{labels}}} {stats.slow_checkouts}")
+        lines += histogram_lines("db_pool_checkout_wait_seconds", labels, stats.wait_histogram)
+    return lines
+
+
+# -------------------------------------------------------------------
+# core/replicas.py
+# -------------------------------------------------------------------
+import itertools
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.logging.logger import logger
+
+class ReplicaSet:
+    """Round-robin replica selection with temporary ejection of failing replicas.
+
+    A replica is ejected for ``eject_seconds`` when a connection to it
+    cannot be opened or is found disconnected. The request that hit the
+    error still fails; later sessions pick another replica, or the primary
+    once every replica is ejected.
+    """
+
+    def __init__(self, engines: List[AsyncEngine], eject_seconds: float = 30.0):
+        self.engines = engines
+        self.eject_seconds = eject_seconds
+        self._ejected_until: Dict[Engine, float] = {}
+        self._counter = itertools.count()
+        for engine in self.engines:
+            event.listen(engine.sync_engine, "handle_error", self._on_error)
+
+    def choose(self) -> Optional[AsyncEngine]:
+        """Next healthy replica, or None if there is none."""
+        if not self.engines:
+            return None
+        now = time.monotonic()
+        start = next(self._counter)
+        for offset in range(len(self.engines)):
+            engine = self.engines[(start + offset) % len(self.engines)]
+            if self._ejected_until.get(engine.sync_engine, 0.0) <= now:
+                return engine
+        return None
+
+    def eject(self, engine: Engine) -> None:
+        self._ejected_until[engine] = time.monotonic() + self.eject_seconds
+        logger.warning(
+            f"[DB] Replica ejected for {self.eject_seconds:g}s",
+            extra={"replica": engine.url.render_as_string(hide_password=True)},
+        )
+
+    def _on_error(self, context: ExceptionContext) -> None:
+        # connection is None when the pool could not open a connection at all
+        if context.is_disconnect or context.connection is None:
+            self.eject(context.engine)
+
+
+# -------------------------------------------------------------------
+# core/query_stats.py
+# -------------------------------------------------------------------
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+class NPlusOneError(RuntimeError):
+    """Raised in strict mode when one statement repeats past the threshold."""
+
+@dataclass
+class QueryStats:
+    """SQL statements issued while serving one request."""
+    trace_id: str = "-"
+    count: int = 0
+    total_ms: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+    n_plus_one: Optional[str] = None  # First statement that hit the threshold
+
+# Set per request (LoggingMiddleware, or get_db as a fallback); SQLAlchemy
+# runs engine events in a greenlet that shares the caller's context.
+query_stats_ctx: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def install_query_stats(engine: AsyncEngine, threshold: int, strict: bool = False) -> None:
+    """Count statements and DB time per request on ``engine``."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        stats = query_stats_ctx.get()
+        if stats is None:
+            return
+        stats.count += 1
+        stats.statements[statement] += 1
+        if stats.statements[statement] >= threshold and stats.n_plus_one is None:
+            stats.n_plus_one = statement[:200]
+            if strict:
+                raise NPlusOneError(
+                    f"Statement ran {threshold}+ times in request {stats.trace_id}: {statement[:200]}"
+                )
+        if context is not None:
+            context._query_start_time = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stats = query_stats_ctx.get()
+        start = getattr(context, "_query_start_time", None)
+        if stats is not None and start is not None:
+            stats.total_ms += (time.perf_counter() - start) * 1000
+
+
 # -------------------------------------------------------------------
 # core/database.py
 # -------------------------------------------------------------------
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from functools import lru_cache
+from typing import Awaitable, Callable, Tuple
+from sqlalchemy import Select, event
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from app.core.config import get_settings
+from sqlalchemy.orm import ORMExecuteState, Session, sessionmaker
+from app.core.config import Settings, get_settings
+from app.core.db_pool import InstrumentedAsyncPool, PoolStats, pool_metrics_lines
+from app.core.context import trace_id_ctx
+from app.core.metrics.endpoint import register_collector
+from app.core.query_stats import QueryStats, install_query_stats, query_stats_ctx
+from app.core.replicas import ReplicaSet
 
-settings = get_settings()
+def _create_engine(settings: Settings, url: str, pool_name: str) -> AsyncEngine:
+    """Engine with the configured pool, metrics collector and query counting."""
+    db = settings.database
+    engine = create_async_engine(
+        url,
+        echo=db.echo,
+        future=True,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=db.pool_size,
+        max_overflow=db.max_overflow,
+        pool_timeout=db.pool_timeout,
+        pool_recycle=db.pool_recycle,
+        pool_pre_ping=db.pool_pre_ping,
+    )
+    engine.pool.stats = PoolStats(wait_warn_ms=db.pool_wait_warn_ms)
+    register_collector(lambda: pool_metrics_lines(pool_name, engine))
+    install_query_stats(
+        engine,
+        threshold=settings.SQL_N_PLUS_ONE_THRESHOLD,
+        strict=settings.SQL_N_PLUS_ONE_STRICT,
+    )
+    return engine
+
+@lru_cache(maxsize=1)
+def _engines() -> Tuple[AsyncEngine, ReplicaSet]:
+    """Build the primary and replica engines on first use.
+
+    Creating an engine imports the DB driver (asyncpg, aiosqlite), so
+    deferring it keeps that cost off import time; the startup warm-up
+    (or else the first session) pays it instead.
+    """
+    settings = get_settings()
+    primary = _create_engine(settings, settings.DATABASE_URL, "primary")
+    replica_engines = [
+        _create_engine(settings, url, f"replica{index}")
+        for index, url in enumerate(settings.DATABASE_REPLICA_URLS)
+    ]
+    return primary, ReplicaSet(replica_engines, eject_seconds=settings.DB_REPLICA_EJECT_SECONDS)
+
+def get_engine() -> AsyncEngine:
+    """The primary engine."""
+    return _engines()[0]
+
+def get_replicas() -> ReplicaSet:
+    """The replica set (possibly empty)."""
+    return _engines()[1]
+
+def __getattr__(name: str):
+    # Keeps `from app.core.database import engine` working without eager creation
+    if name == "engine":
+        return get_engine()
+    if name == "replicas":
+        return get_replicas()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+class ReadOnlySessionError(RuntimeError):
+    """A read-only session was asked to flush changes."""
+
+
+class TrackedSession(Session):
+    """Session that records in ``info["has_writes"]`` whether it issued DML.
+
+    Sessions autobegin, so no connection is checked out until the first
+    query; ``get_db`` uses the flag to skip the COMMIT round trip when a
+    request only read (or never touched the database at all).
+    """
+
+
+@event.listens_for(TrackedSession, "do_orm_execute")
+def _track_execute_writes(orm_execute_state: ORMExecuteState) -> None:
+    # Anything that is not a SELECT (ORM DML, text(), DDL) counts as a write
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+@event.listens_for(TrackedSession, "after_flush")
+def _track_flush_writes(session: Session, flush_context) -> None:
+    session.info["has_writes"] = True
+
+
+@event.listens_for(TrackedSession, "before_flush")
+def _guard_read_only(session: Session, flush_context, instances) -> None:
+    if session.info.get("read_only") and (session.new or session.dirty or session.deleted):
+        raise ReadOnlySessionError("Read-only session cannot flush changes")
+
+
+class RoutingSession(TrackedSession):
+    """Sends plain SELECTs to a replica and everything else to the primary.
+
+    The replica is picked once per session, so a request sees one
+    consistent snapshot. After the first write (or flush) every later
+    statement goes to the primary, so a request reads its own writes.
+    Locking selects (``with_for_update``), selects marked with
+    ``execution_options(use_primary=True)`` (cache fills) and sessions
+    opened with ``info={"primary_only": True}`` always use the primary.
+
+    ``info["replica_read"]`` is set once a replica served a read: those
+    rows may lag behind the primary, so callers must not cache them.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        primary, replicas = _engines()
+        if (
+            self._flushing
+            or self.info.get("has_writes")
+            or self.info.get("primary_only")
+            or not isinstance(clause, Select)
+            or clause._for_update_arg is not None
+            or clause.get_execution_options().get("use_primary")
+        ):
+            return primary.sync_engine
+        replica = self.info.get("replica")
+        if replica is None:
+            chosen = replicas.choose()
+            replica = self.info["replica"] = (chosen or primary).sync_engine
+            self.info["replica_read"] = chosen is not None
+        return replica
+
+
+def has_pending_writes(session: AsyncSession) -> bool:
+    """True if the session wrote, or still holds unflushed changes."""
+    return bool(
+        session.info.get("has_writes") or session.new or session.dirty or session.deleted
+    )
+
+
+class AfterCommitSession(AsyncSession):
+    """AsyncSession that runs ``after_commit`` callbacks once COMMIT returns.
+
+    Callbacks registered in a transaction that rolls back are dropped.
+    """
+
+    async def commit(self) -> None:
+        await super().commit()
+        for callback in self.info.pop("after_commit", []):
+            await callback()
+
+    async def rollback(self) -> None:
+        self.info.pop("after_commit", None)
+        await super().rollback()
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], Awaitable[None]]) -> None:
+    """Run ``callback`` after the session's next successful ``commit()``."""
+    session.info.setdefault("after_commit", []).append(callback)
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=True,
-    future=True
-)
 
 AsyncSessionLocal = sessionmaker(
-    engine,
-    class_=AsyncSession,
+    class_=AfterCommitSession,
+    sync_session_class=RoutingSession,
     expire_on_commit=False
 )
 
+ReadOnlySessionLocal = sessionmaker(
+    class_=AfterCommitSession,
+    sync_session_class=RoutingSession,
+    expire_on_commit=False,
+    autoflush=False,
+    info={"read_only": True},
+)
+
 Base = declarative_base()
 
 async def get_db() -> AsyncSession:
-    """Dependency for database session."""
+    """Dependency for database session.
+
+    The connection is checked out lazily on the first query, and COMMIT is
+    only sent when the request actually wrote something.
+    """
+    # Outside LoggingMiddleware (tests, scripts) count per dependency instead
+    owns_stats = query_stats_ctx.get() is None
+    if owns_stats:
+        query_stats_ctx.set(QueryStats(trace_id=trace_id_ctx.get()))
     async with AsyncSessionLocal() as session:
         try:
             yield session
-            await session.commit()
+            if session.in_transaction() and has_pending_writes(session):
+                await session.commit()
         except Exception:
-            await session.rollback()
+            if session.in_transaction():
+                await session.rollback()
             raise
+        finally:
+            # Returns the connection, if one was checked out; a read-only
+            # transaction ends with the ROLLBACK on close instead of a COMMIT
+            await session.close()
+            if owns_stats:
+                query_stats_ctx.set(None)
+
+async def get_read_db() -> AsyncSession:
+    """Dependency for a read-only session (no autoflush, flushes rejected, never commits)."""
+    owns_stats = query_stats_ctx.get() is None
+    if owns_stats:
+        query_stats_ctx.set(QueryStats(trace_id=trace_id_ctx.get()))
+    async with ReadOnlySessionLocal() as session:
+        try:
+            yield session
         finally:
             await session.close()
+            if owns_stats:
+                query_stats_ctx.set(None)
+
+
+# -------------------------------------------------------------------
+# core/warmup.py
+# -------------------------------------------------------------------
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Set, Type, get_args
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import get_settings
+from app.core.database import ReadOnlySessionLocal, get_engine, get_replicas
+from app.core.logging.logger import logger
+from app.core.security import (
+    calibrate_bcrypt_rounds,
+    configure_bcrypt_rounds,
+    create_access_token,
+    decode_access_token,
+    get_password_hash,
+    password_hash_pool,
+)
+from app.core.serialization import serializer_for
+from app.repositories.user_repository import user_repository
+
+@contextmanager
+def startup_phase(phases: Dict[str, float], name: str) -> Iterator[None]:
+    """Record how long one startup step took, in milliseconds."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = round((time.perf_counter() - start) * 1000, 1)
+
+async def warm_pool(engine: AsyncEngine, connections: int) -> int:
+    """Open up to ``connections`` pool connections at once, then check them in.
+
+    Holding them concurrently forces distinct connections (TCP + TLS +
+    auth) instead of reusing one; capped at the pool size because
+    overflow connections are discarded on check-in.
+    """
+    count = min(connections, engine.pool.size())
+    results = await asyncio.gather(
+        *(engine.connect().start() for _ in range(count)), return_exceptions=True
+    )
+    opened = [conn for conn in results if not isinstance(conn, BaseException)]
+    await asyncio.gather(*(conn.close() for conn in opened))
+    for error in results:
+        if isinstance(error, BaseException):
+            raise error
+    return len(opened)
+
+def _models_in(annotation: Any) -> Iterator[Type[BaseModel]]:
+    """Pydantic models in a response_model annotation (``List[User]``, ``Page[User]``)."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        yield annotation
+        for field in annotation.model_fields.values():
+            yield from _models_in(field.annotation)
+    for arg in get_args(annotation):
+        yield from _models_in(arg)
+
+def warm_serializers(app: FastAPI) -> int:
+    """Build serializers for every response model and the OpenAPI schema."""
+    models: Set[Type[BaseModel]] = set()
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.response_model is not None:
+            models.update(_models_in(route.response_model))
+    for model in models:
+        serializer_for(model)
+    app.openapi()  # Cached on the app; otherwise built by the first /docs hit
+    return len(models)
+
+async def configure_password_hashing() -> int:
+    """Set the bcrypt cost for this process and return it.
+
+    Pin BCRYPT_ROUNDS for mixed-hardware fleets; otherwise every host
+    calibrates to its own CPU and logins rehash towards that cost.
+    """
+    settings = get_settings()
+    rounds = settings.BCRYPT_ROUNDS or await password_hash_pool.run(
+        calibrate_bcrypt_rounds,
+        settings.BCRYPT_TARGET_MS,
+        settings.BCRYPT_MIN_ROUNDS,
+        settings.BCRYPT_MAX_ROUNDS,
+    )
+    configure_bcrypt_rounds(rounds)
+    return rounds
+
+async def warm_security() -> None:
+    """Import jose/passlib and run bcrypt once at the configured cost."""
+    decode_access_token(create_access_token({"sub": "0"}))
+    await password_hash_pool.run(get_password_hash, "warm-up")
+
+async def _run_steps(app: FastAPI, phases: Dict[str, float]) -> None:
+    settings = get_settings()
+    # First, and independent of the database: a failed pool step must not
+    # leave the process hashing at passlib's default cost
+    with startup_phase(phases, "bcrypt"):
+        app.state.bcrypt_rounds = await configure_password_hashing()
+    with startup_phase(phases, "pool"):
+        engines = [get_engine(), *get_replicas().engines]
+        await asyncio.gather(
+            *(warm_pool(engine, settings.WARMUP_POOL_CONNECTIONS) for engine in engines)
+        )
+    with startup_phase(phases, "serializers"):
+        warm_serializers(app)
+    with startup_phase(phases, "security"):
+        await warm_security()
+    with startup_phase(phases, "caches"):
+        # Primary: rows read from a lagging replica must not seed the cache
+        async with ReadOnlySessionLocal(info={"primary_only": True}) as db:
+            await user_repository.warm_cache(db, settings.WARMUP_CACHE_ROWS)
+
+async def warm_up(app: FastAPI) -> None:
+    """Warm everything the first requests would otherwise pay for, then mark ready.
+
+    Failures and timeouts are logged and the app is marked ready anyway:
+    serving cold beats never becoming ready.
+    """
+    phases = app.state.warmup_phases = {}
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(_run_steps(app, phases), get_settings().WARMUP_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning("[Startup] warm-up timed out; serving partially warm")
+    except Exception:
+        logger.exception("[Startup] warm-up failed; serving cold")
+    app.state.warmup_ms = round((time.perf_counter() - start) * 1000, 1)
+    app.state.ready = True
+    logger.info(
+        "[Startup] warm-up complete",
+        extra={
+            "warmup_ms": app.state.warmup_ms,
+            **{f"warmup_{name}_ms": ms for name, ms in phases.items()},
+        },
+    )
@@ -1,22 +1,38 @@
 # Pattern 5: Authentication & Authorization
 # - JWT token creation and verification
-# - Password hashing with bcrypt
+# - Password hashing with bcrypt (off the event loop, bounded pool)
+# - bcrypt cost calibrated at startup to a target latency
 # - OAuth2 dependency for protected routes
+# - Verified-principal cache so repeat tokens skip jwt.decode + DB lookup
+# - jose/passlib imported on first use, not at startup
 
 # -------------------------------------------------------------------
 # core/security.py
 # -------------------------------------------------------------------
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Optional, TypeVar
 from app.core.config import get_settings
 
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
 settings = get_settings()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 ALGORITHM = "HS256"
 
+# jose and passlib (with its bcrypt backend) are imported on first use, so
+# they stay off the cold-start path; `python -X importtime` shows the saving.
+@lru_cache(maxsize=1)
+def get_pwd_context() -> "CryptContext":
+    """Shared bcrypt CryptContext, built on first use."""
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token."""
     to_encode = data.copy()
@@ -25,16 +41,196 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
+    from jose import jwt
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def decode_access_token(token: str) -> Optional[dict]:
+    """Verify a JWT and return its claims, or None if it is invalid."""
+    from jose import JWTError, jwt
+    try:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Hash password."""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Check whether a hash was made with a different cost or scheme."""
+    return get_pwd_context().needs_update(hashed_password)
+
+def calibrate_bcrypt_rounds(target_ms: float, min_rounds: int, max_rounds: int) -> int:
+    """Pick the highest bcrypt cost whose hash time stays within ``target_ms``.
+
+    Times ``min_rounds`` (best of 3 to dodge scheduler noise) and
+    extrapolates: every extra round doubles the work.
+    """
+    bcrypt = get_pwd_context().handler("bcrypt").using(rounds=min_rounds)
+    samples = []
+    for _ in range(3):
+        start = time.perf_counter()
+        bcrypt.hash("calibration")
+        samples.append((time.perf_counter() - start) * 1000)
+
+    rounds, elapsed_ms = min_rounds, min(samples)
+    while rounds < max_rounds and elapsed_ms * 2 <= target_ms:
+        rounds += 1
+        elapsed_ms *= 2
+    return rounds
+
+def configure_bcrypt_rounds(rounds: int) -> None:
+    """Hash new passwords with ``rounds`` and flag cheaper hashes for rehash.
+
+    Only a floor is set: hashes made with a higher cost (e.g. on a faster
+    host) are kept rather than downgraded.
+    """
+    get_pwd_context().update(
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+    )
+
+
+T = TypeVar("T")
+
+class HashingPoolSaturated(RuntimeError):
+    """Raised when the password hashing pool has no queue capacity left."""
+
+class PasswordHashPool:
+    """Dedicated, bounded thread pool for bcrypt work.
+
+    bcrypt releases the GIL, so hashing on worker threads keeps the event
+    loop free. At most ``max_workers`` hashes run at once and at most
+    ``max_queue`` more wait; beyond that ``run`` fails fast with
+    ``HashingPoolSaturated`` instead of letting latency pile up.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hash"
+        )
+        self._capacity = max_workers + max_queue
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        with self._lock:
+            if self._pending >= self._capacity:
+                raise HashingPoolSaturated("Password hashing pool is saturated")
+            self._pending += 1
+        future = self._executor.submit(fn, *args)
+        # Released when the work actually finishes, even if the caller is cancelled
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, _: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+password_hash_pool = PasswordHashPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify password on the hashing pool."""
+    return await password_hash_pool.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash password on the hashing pool."""
+    return await password_hash_pool.run(get_password_hash, password)
+
+
+# -------------------------------------------------------------------
+# core/principal_cache.py
+# -------------------------------------------------------------------
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Set
+
+from app.core.cache import restore, snapshot
+from app.core.config import get_settings
+from app.models.user import User
+
+class _Principal(NamedTuple):
+    expires_at: float
+    claims: Dict[str, Any]
+    user_id: int
+    user_data: Dict[str, Any]
+
+class PrincipalCache:
+    """Bounded cache of verified bearer tokens.
+
+    Keyed by the SHA-256 digest of the token (the raw token is never
+    stored). An entry lives until the token's ``exp``, at most ``max_ttl``
+    seconds, or until ``invalidate_user`` is called for its user. Each hit
+    returns a fresh detached ``User`` so requests never share an instance.
+    Invalidation is per process; ``max_ttl`` bounds staleness across workers.
+    """
+
+    def __init__(self, maxsize: int = 10_000, max_ttl: float = 5.0):
+        self.maxsize = maxsize
+        self.max_ttl = max_ttl
+        self._entries: "OrderedDict[bytes, _Principal]" = OrderedDict()
+        self._by_user: Dict[int, Set[bytes]] = {}
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[User]:
+        """Return the cached user for ``token`` or ``None``."""
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.time():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return restore(User, entry.user_data)
+
+    def put(self, token: str, claims: Dict[str, Any], user: User) -> None:
+        """Cache a verified token until its ``exp`` (capped at ``max_ttl``)."""
+        expires_at = time.time() + self.max_ttl
+        if "exp" in claims:
+            expires_at = min(expires_at, float(claims["exp"]))
+        key = self._key(token)
+        self._remove(key)
+        self._entries[key] = _Principal(expires_at, claims, user.id, snapshot(user))
+        self._by_user.setdefault(user.id, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop every cached token for a user (password change, delete, ...)."""
+        for key in self._by_user.pop(user_id, set()):
+            self._entries.pop(key, None)
+
+    def _remove(self, key: bytes) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._by_user.get(entry.user_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_user[entry.user_id]
+
+settings = get_settings()
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    max_ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
 
 
 # -------------------------------------------------------------------
@@ -42,37 +238,53 @@ def get_password_hash(password: str) -> str:
 # -------------------------------------------------------------------
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
-from app.core.security import ALGORITHM
+from app.core.security import decode_access_token
 from app.core.config import get_settings
+from app.core.principal_cache import principal_cache
 from app.repositories.user_repository import user_repository
 
+settings = get_settings()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
 async def get_current_user(
     db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme)
 ):
-    """Get current authenticated user."""
+    """Get current authenticated user.
+
+    Uses ``get_db`` like the protected routes do; FastAPI resolves a
+    dependency once per request, so the lookup and the handler share one
+    session (and at most one pooled connection).
+    """
+    # Hot path: token already verified and resolved by this process
+    cached_user = principal_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    payload = decode_access_token(token)
+    if payload is None:
+        raise credentials_exception
+    # JWT "sub" is a string; repository lookups (and the batch loader) key by int
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: int = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
+        user_id = int(payload["sub"])
+    except (KeyError, TypeError, ValueError):
         raise credentials_exception
 
     user = await user_repository.get(db, user_id)
     if user is None:
         raise credentials_exception
 
+    # A lagging replica may still return a just-deleted or just-changed user;
+    # serve it for this request, but do not keep it for later ones
+    if not db.info.get("replica_read"):
+        principal_cache.put(token, payload, user)
     return user
@@ -0,0 +1,637 @@
+# Benchmarking: Repeatable before/after performance checks
+# - In-process ASGI transport, so numbers measure the app rather than the network
+# - Each script compares the previous implementation against the optimized one
+#
+# Directory structure:
+#   benchmarks/
+#   ├── __init__.py
+#   ├── bench_logging_middleware.py   # BaseHTTPMiddleware vs pure ASGI logging
+#   ├── bench_json_formatter.py       # JsonFormatter vs FastJsonFormatter
+#   ├── bench_serialization.py        # response_model path vs FastSerializer
+#   ├── startup_report.py             # Import time per module + lifespan phases
+#   └── bench_endpoints.py            # Full app per endpoint: rps, latency, memory; baseline gate
+
+# -------------------------------------------------------------------
+# benchmarks/bench_logging_middleware.py
+# -------------------------------------------------------------------
+# Usage:
+#   python -m benchmarks.bench_logging_middleware --requests 5000 --concurrency 50
+import argparse
+import asyncio
+import json
+import logging
+import time
+import uuid
+
+import httpx
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.context import trace_id_ctx
+from app.core.logging.logger import logger
+from app.core.middleware.logging import LoggingMiddleware
+
+
+async def legacy_set_logging(request: Request, call_next):
+    """Previous BaseHTTPMiddleware dispatch: buffers and re-injects the body."""
+    trace_id = request.headers.get("X-Trace-ID") or str(uuid.uuid4())
+    trace_id_ctx.set(trace_id)
+    start_time = time.time()
+
+    request_body = None
+    if request.method in ("POST", "PUT", "PATCH"):
+        body_bytes = await request.body()
+        if body_bytes:
+            request_body = body_bytes.decode("utf-8")
+
+            async def receive():
+                return {"type": "http.request", "body": body_bytes}
+            request._receive = receive
+
+    response = await call_next(request)
+    log_extra = {
+        "path": request.url.path,
+        "method": request.method,
+        "status_code": response.status_code,
+        "duration_ms": round((time.time() - start_time) * 1000),
+    }
+    if request_body:
+        log_extra["content_str"] = request_body
+    logger.info("[Middleware] request processed", extra=log_extra)
+    response.headers["X-Trace-ID"] = trace_id
+    return response
+
+
+def build_app(variant: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"id": item_id}
+
+    @app.post("/items")
+    async def create_item(item: dict):
+        return item
+
+    if variant == "before":
+        app.add_middleware(BaseHTTPMiddleware, dispatch=legacy_set_logging)
+    else:
+        app.add_middleware(LoggingMiddleware)
+    return app
+
+
+async def run(variant: str, total: int, concurrency: int, payload: dict) -> float:
+    """Return requests/second for one middleware variant."""
+    transport = httpx.ASGITransport(app=build_app(variant))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        counter = iter(range(total))
+
+        async def worker() -> None:
+            for i in counter:
+                if i % 2:
+                    await client.get(f"/items/{i}")
+                else:
+                    await client.post("/items", json=payload)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return total / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Logging middleware throughput")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--body-bytes", type=int, default=2048)
+    args = parser.parse_args()
+
+    # Measure middleware overhead, not stdout throughput
+    logger.handlers = [logging.NullHandler()]
+    payload = {"data": "x" * args.body_bytes}
+
+    results = {
+        variant: round(asyncio.run(run(variant, args.requests, args.concurrency, payload)), 1)
+        for variant in ("before", "after")
+    }
+    results["speedup"] = round(results["after"] / results["before"], 2)
+    print(json.dumps({"benchmark": "logging_middleware", "rps": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
+
+
+# -------------------------------------------------------------------
+# benchmarks/bench_json_formatter.py
+# -------------------------------------------------------------------
+# Usage:
+#   python -m benchmarks.bench_json_formatter --records 200000
+import argparse
+import json
+import logging
+import time
+
+from app.core.logging.logger_formatter import FastJsonFormatter, JsonFormatter
+
+
+def make_records(count: int) -> list[logging.LogRecord]:
+    """Access-log-shaped records spread over a few seconds."""
+    base = time.time()
+    records = []
+    for i in range(count):
+        record = logging.LogRecord(
+            "my-service", logging.INFO, __file__, 1, "[Middleware] request processed", None, None
+        )
+        record.created = base + i / 50_000
+        record.trace_id = "6f1c0a4e-1d2b-4c55-9d0e-2f4b7a1c9e33"
+        record.path = f"/api/v1/users/{i}"
+        record.method = "GET"
+        record.status_code = 200
+        record.duration_ms = i % 40
+        records.append(record)
+    return records
+
+
+def bench(formatter: logging.Formatter, records: list[logging.LogRecord]) -> float:
+    """Return records formatted per second."""
+    fmt = formatter.format
+    start = time.perf_counter()
+    for record in records:
+        fmt(record)
+    return len(records) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JSON log formatter throughput")
+    parser.add_argument("--records", type=int, default=200_000)
+    args = parser.parse_args()
+
+    records = make_records(args.records)
+    baseline, fast = JsonFormatter(), FastJsonFormatter()
+    mismatches = sum(baseline.format(r) != fast.format(r) for r in records[:1000])
+
+    results = {
+        "json_formatter": bench(baseline, records),
+        "fast_json_formatter": bench(fast, records),
+        "fast_json_formatter_orjson": bench(FastJsonFormatter(use_orjson=True), records),
+    }
+    print(json.dumps({
+        "benchmark": "json_formatter",
+        "records_per_second": {name: round(rate) for name, rate in results.items()},
+        "speedup": round(results["fast_json_formatter"] / results["json_formatter"], 2),
+        "byte_mismatches_in_first_1000": mismatches,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
+
+
+# -------------------------------------------------------------------
+# benchmarks/bench_serialization.py
+# -------------------------------------------------------------------
+# Usage:
+#   python -m benchmarks.bench_serialization --rows 1000 --repeat 200
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import List, Optional
+
+from pydantic import BaseModel, TypeAdapter
+
+from app.core.serialization import FastSerializer, dumps
+
+
+class UserOut(BaseModel):
+    """Shape of the public user schema."""
+    id: int
+    email: str
+    full_name: Optional[str] = None
+    is_active: bool = True
+    created_at: datetime
+
+
+def make_rows(count: int) -> list:
+    """ORM-like rows (attribute access only), including a column the schema hides."""
+    created_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        SimpleNamespace(
+            id=i,
+            email=f"user{i}@example.com",
+            full_name=f"User {i}",
+            is_active=bool(i % 2),
+            created_at=created_at,
+            hashed_password="$2b$12$" + "x" * 53,
+        )
+        for i in range(count)
+    ]
+
+
+def response_model_path(adapter: TypeAdapter, rows: list) -> bytes:
+    """What FastAPI does for ``response_model=List[User]`` + JSONResponse."""
+    validated = adapter.validate_python(rows, from_attributes=True)
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def bench(fn, rows: list, repeat: int) -> float:
+    """Return rows serialized per second."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(rows)
+    return len(rows) * repeat / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Response serialization throughput")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    adapter = TypeAdapter(List[UserOut])
+    serializer = FastSerializer(UserOut)
+
+    same_output = json.loads(response_model_path(adapter, rows)) == json.loads(
+        dumps(serializer.to_dicts(rows))
+    )
+
+    results = {
+        "response_model": bench(lambda r: response_model_path(adapter, r), rows, args.repeat),
+        "fast_serializer": bench(lambda r: dumps(serializer.to_dicts(r)), rows, args.repeat),
+        "validated_json": bench(serializer.validate_json, rows, args.repeat),
+    }
+    print(json.dumps({
+        "benchmark": "serialization",
+        "rows_per_second": {name: round(rate) for name, rate in results.items()},
+        "speedup": round(results["fast_serializer"] / results["response_model"], 2),
+        "same_output": same_output,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
+
+
+# -------------------------------------------------------------------
+# benchmarks/startup_report.py
+# -------------------------------------------------------------------
+# Cold-start profile: each run is a fresh interpreter that imports the app,
+# runs its lifespan and serves one request, with `-X importtime` enabled.
+#
+# Usage:
+#   python -m benchmarks.startup_report --app app.main:app --runs 5 --top 20
+#   CONFIG_SNAPSHOT=config.snapshot.json python -m benchmarks.startup_report
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+CHILD = """
+import asyncio, importlib, json, time
+import httpx  # Harness only; imported before the clock starts
+start = time.perf_counter()
+module = importlib.import_module({module!r})
+app = getattr(module, {attr!r})
+imported = time.perf_counter()
+
+async def serve_first_request():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            await client.get({path!r})
+        return ready, time.perf_counter()
+
+ready, served = asyncio.run(serve_first_request())
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "lifespan_ms": (ready - imported) * 1000,
+    "first_request_ms": (served - ready) * 1000,
+    "time_to_first_request_ms": (served - start) * 1000,
+    "startup_phases_ms": getattr(app.state, "startup_phases", {{}}),
+}}))
+"""
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """``(module, self_us, cumulative_us)`` rows from ``-X importtime`` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def run_once(module: str, attr: str, path: str) -> tuple[dict, list]:
+    code = CHILD.format(module=module, attr=attr, path=path)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1]), parse_importtime(proc.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cold-start profile")
+    parser.add_argument("--app", default="app.main:app")
+    parser.add_argument("--path", default="/api/v1/users/me")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    module, _, attr = args.app.partition(":")
+    runs = [run_once(module, attr or "app", args.path) for _ in range(args.runs)]
+    timings = [timing for timing, _ in runs]
+    imports = runs[-1][1]  # Last run: warm OS file cache, like a rescheduled pod
+
+    by_package: dict[str, int] = defaultdict(int)
+    for name, self_us, _ in imports:
+        by_package[name.split(".")[0]] += self_us
+
+    def median(key: str) -> float:
+        return round(statistics.median(t[key] for t in timings), 1)
+
+    print(json.dumps({
+        "benchmark": "startup",
+        "runs": args.runs,
+        "median_ms": {
+            key: median(key)
+            for key in ("import_ms", "lifespan_ms", "first_request_ms", "time_to_first_request_ms")
+        },
+        "startup_phases_ms": timings[-1]["startup_phases_ms"],
+        "slowest_imports_ms": {
+            name: round(self_us / 1000, 1)
+            for name, self_us, _ in sorted(imports, key=lambda row: -row[1])[:args.top]
+        },
+        "import_ms_by_package": {
+            package: round(self_us / 1000, 1)
+            for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
+
+
+# -------------------------------------------------------------------
+# benchmarks/bench_endpoints.py
+# -------------------------------------------------------------------
+# End-to-end throughput of the real app (routing, auth, get_db, SQLAlchemy)
+# against a throwaway aiosqlite file, over the same ASGITransport client as
+# tests/conftest.py. The JSON report can be saved as a baseline; a later run
+# with --baseline exits 1 if any scenario regressed beyond --threshold.
+# Compare runs from the same machine and flags; tail latencies on a shared
+# host swing run to run, so keep --threshold above that spread.
+#
+# Usage:
+#   python -m benchmarks.bench_endpoints --requests 2000 --concurrency 20 --output baseline.json
+#   python -m benchmarks.bench_endpoints --requests 2000 --concurrency 20 --baseline baseline.json
+#   python -m benchmarks.bench_endpoints --scenarios read me list --threshold 0.05
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+import httpx
+
+API = "/api/v1/users"
+
+
+@dataclass
+class Fixtures:
+    users: list                        # (id, auth headers) pairs seeded before the run
+    payload: Callable[[int], dict]     # Unique UserCreate body per request index
+
+
+Scenario = Callable[[httpx.AsyncClient, Fixtures, int], Awaitable[httpx.Response]]
+
+
+async def create(client, fixtures, i):
+    return await client.post(f"{API}/", json=fixtures.payload(i))
+
+
+async def read(client, fixtures, i):
+    user_id, headers = fixtures.users[i % len(fixtures.users)]
+    return await client.get(f"{API}/{user_id}", headers=headers)
+
+
+async def read_me(client, fixtures, i):
+    _, headers = fixtures.users[i % len(fixtures.users)]
+    return await client.get(f"{API}/me", headers=headers)
+
+
+async def update(client, fixtures, i):
+    user_id, headers = fixtures.users[i % len(fixtures.users)]
+    return await client.patch(f"{API}/{user_id}", json={"name": f"Renamed {i}"}, headers=headers)
+
+
+async def delete(client, fixtures, i):
+    user_id, headers = fixtures.users[i]  # One seeded user per request
+    return await client.delete(f"{API}/{user_id}", headers=headers)
+
+
+async def list_page(client, fixtures, i):
+    _, headers = fixtures.users[i % len(fixtures.users)]
+    return await client.get(f"{API}/?limit=50", headers=headers)
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "create": create,
+    "read": read,
+    "me": read_me,
+    "update": update,
+    "delete": delete,
+    "list": list_page,
+}
+
+EXPECTED_STATUS = {"create": 201, "read": 200, "me": 200, "update": 200, "delete": 204, "list": 200}
+
+# Regression direction per metric: +1 means higher is better
+METRICS = {"rps": 1, "p50_ms": -1, "p95_ms": -1, "p99_ms": -1, "alloc_peak_kib": -1}
+
+
+async def seed_users(client: httpx.AsyncClient, support, count: int, prefix: str) -> list:
+    """Create ``count`` users through the bulk endpoint; return ``(id, headers)`` pairs.
+
+    The bulk endpoint needs a bearer token, so the first user is created
+    through the single-user endpoint and authorizes the rest.
+    """
+    response = await client.post(f"{API}/", json=support.user_payload(0, prefix=prefix))
+    response.raise_for_status()
+    first_id = response.json()["id"]
+    users = [(first_id, support.auth_headers(first_id))]
+    for start in range(1, count, 500):
+        batch = [support.user_payload(i, prefix=prefix) for i in range(start, min(start + 500, count))]
+        response = await client.post(f"{API}/bulk", json=batch, headers=users[0][1])
+        response.raise_for_status()
+        users += [(user["id"], support.auth_headers(user["id"])) for user in response.json()]
+    return users
+
+
+async def measure(
+    client: httpx.AsyncClient, scenario: Scenario, fixtures: Fixtures, expected: int,
+    total: int, concurrency: int, offset: int = 0,
+) -> tuple[float, list[float]]:
+    """Run ``total`` requests over ``concurrency`` workers; return (rps, latencies in ms)."""
+    counter = iter(range(offset, offset + total))
+    latencies: list[float] = []
+
+    async def worker() -> None:
+        for i in counter:
+            start = time.perf_counter()
+            response = await scenario(client, fixtures, i)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != expected:
+                raise RuntimeError(f"{response.request.method} {response.request.url.path} "
+                                   f"-> {response.status_code}: {response.text[:200]}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total / (time.perf_counter() - start), latencies
+
+
+async def measure_allocations(
+    client: httpx.AsyncClient, scenario: Scenario, fixtures: Fixtures, samples: int, offset: int
+) -> float:
+    """Median tracemalloc peak (KiB) above the pre-request baseline, one request at a time.
+
+    Tracing slows allocation-heavy code several-fold, so this runs after
+    (and separately from) the timed pass.
+    """
+    peaks = []
+    tracemalloc.start()
+    try:
+        for i in range(offset, offset + samples):
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            await scenario(client, fixtures, i)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    return statistics.median(peaks) / 1024
+
+
+async def run_scenario(name: str, client: httpx.AsyncClient, fixtures: Fixtures, support, args) -> dict:
+    scenario, expected = SCENARIOS[name], EXPECTED_STATUS[name]
+    if name == "delete":
+        needed = args.warmup + args.requests + args.alloc_samples
+        users = await seed_users(client, support, needed, prefix=f"delete-{os.getpid()}")
+        fixtures = Fixtures(users, fixtures.payload)
+
+    # Untimed warm-up: first-use costs (engine, pool, caches) stay out of the numbers
+    await measure(client, scenario, fixtures, expected, args.warmup, args.concurrency)
+    rps, latencies = await measure(
+        client, scenario, fixtures, expected, args.requests, args.concurrency, offset=args.warmup
+    )
+    alloc_peak_kib = await measure_allocations(
+        client, scenario, fixtures, args.alloc_samples, offset=args.warmup + args.requests
+    )
+    percentiles = statistics.quantiles(latencies, n=100)
+    return {
+        "rps": round(rps, 1),
+        "p50_ms": round(percentiles[49], 2),
+        "p95_ms": round(percentiles[94], 2),
+        "p99_ms": round(percentiles[98], 2),
+        "alloc_peak_kib": round(alloc_peak_kib, 1),
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> tuple[dict, list[str]]:
+    """Relative change per scenario/metric, plus the ones worse than ``threshold``."""
+    changes, regressions = {}, []
+    for name, metrics in current.items():
+        if name not in baseline:
+            continue
+        changes[name] = {}
+        for metric, direction in METRICS.items():
+            before, after = baseline[name].get(metric), metrics[metric]
+            if not before:
+                continue
+            change = (after - before) / before
+            changes[name][metric] = round(change, 3)
+            if change * direction < -threshold:
+                regressions.append(f"{name}.{metric}: {before} -> {after} ({change:+.1%})")
+    return changes, regressions
+
+
+async def run_suite(app, support, args) -> dict:
+    from app.core.database import get_engine
+    from app.core.security import configure_bcrypt_rounds
+
+    # bcrypt at production cost would make create/update a hashing benchmark
+    configure_bcrypt_rounds(args.bcrypt_rounds)
+    await support.create_schema(get_engine())
+    async with support.make_client(app) as client:
+        fixtures = Fixtures(
+            users=await seed_users(client, support, args.users, prefix=f"seed-{os.getpid()}"),
+            payload=lambda i: support.user_payload(i, prefix=f"create-{os.getpid()}"),
+        )
+        return {
+            name: await run_scenario(name, client, fixtures, support, args)
+            for name in args.scenarios
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end endpoint benchmark")
+    parser.add_argument("--app", default="app.main:app")
+    parser.add_argument("--database-url", help="Default: a fresh SQLite file in a temp directory")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--alloc-samples", type=int, default=100)
+    parser.add_argument("--users", type=int, default=200, help="Seeded users for read/me/update/list")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4)
+    parser.add_argument("--output", help="Write the report here (e.g. to use as a baseline)")
+    parser.add_argument("--baseline", help="Report from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    # Settings are read when the app is imported, so point them at the bench DB first
+    tmpdir = tempfile.mkdtemp(prefix="bench-endpoints-")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite+aiosqlite:///{tmpdir}/bench.db"
+    module, _, attr = args.app.partition(":")
+    app = getattr(importlib.import_module(module), attr or "app")
+    support = importlib.import_module("tests.support")
+
+    report = {
+        "benchmark": "endpoints",
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "scenarios": asyncio.run(run_suite(app, support, args)),
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report["threshold"] = args.threshold
+        report["change_vs_baseline"], regressions = compare(
+            report["scenarios"], baseline["scenarios"], args.threshold
+        )
+        report["regressions"] = regressions
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
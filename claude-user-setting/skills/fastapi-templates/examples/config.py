@@ -1,12 +1,14 @@
 # Pattern 6: Configuration (YAML + Pydantic v2 Settings)
 # - Environment-aware config loading from YAML files
 # - Nested Pydantic models for grouped settings
-# - Module-level singleton pattern
+# - Module-level singleton pattern (also returned by get_settings)
+# - Optional pre-resolved JSON snapshot that skips YAML parsing at startup
 #
 # Directory structure:
 #   app/core/config/
 #   ├── __init__.py              # Exports settings singleton
 #   ├── config.py                # Settings class & loading logic
+#   ├── config.snapshot.json     # Optional, generated at image build time
 #   ├── config.example.yaml      # Template for all environments
 #   ├── config.local.yaml        # Local development overrides
 #   ├── config.dev.yaml          # Dev environment
@@ -16,12 +18,14 @@
 # core/config/config.py
 # -------------------------------------------------------------------
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Literal
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, Field
 from pydantic_settings import (
     BaseSettings,
+    JsonConfigSettingsSource,
     PydanticBaseSettingsSource,
     YamlConfigSettingsSource,
 )
@@ -32,6 +36,8 @@ LogLevel = Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
 _CONFIG_DIR = Path(__file__).resolve().parent
 _ENV: Env = os.getenv("ENV", "local")
 _CONFIG_PATH = _CONFIG_DIR / f"config.{_ENV}.yaml"
+# Pre-resolved settings written by write_snapshot(); replaces the YAML source
+_SNAPSHOT_PATH = os.getenv("CONFIG_SNAPSHOT")
 
 
 class EmbeddingConfig(BaseModel):
@@ -42,6 +48,62 @@ class EmbeddingConfig(BaseModel):
         description="Base URL of the embedding API.",
         pattern=r"^https?://.+",
     )
+    model: str = Field(default="default", description="Embedding model name sent upstream.")
+    timeout: float = Field(default=10.0, gt=0, description="Per-request timeout (s).")
+    pool_timeout: float = Field(default=5.0, gt=0, description="Seconds to wait for a free connection.")
+    max_connections: int = Field(default=20, ge=1, description="Concurrent upstream connections.")
+    max_keepalive_connections: int = Field(default=10, ge=0, description="Idle connections kept open.")
+    keepalive_expiry: float = Field(default=30.0, ge=0, description="Close idle connections after (s).")
+    http2: bool = Field(default=False, description="Use HTTP/2 (requires the h2 package).")
+    batch_enabled: bool = Field(default=True, description="Coalesce concurrent embed() calls.")
+    batch_max_size: int = Field(default=64, ge=1, description="Texts per upstream request.")
+    batch_max_wait_ms: float = Field(default=5.0, ge=0, description="Max wait to fill a batch (ms).")
+    cache_enabled: bool = Field(default=True, description="Cache vectors by (model, normalized text).")
+    cache_max_entries: int = Field(default=50_000, ge=1, description="Vectors kept in the memory LRU.")
+    cache_dir: str | None = Field(default=None, description="Directory for the mmap disk tier (off if unset).")
+    dimension: int | None = Field(default=None, ge=1, description="Vector dimension (required for cache_dir).")
+
+
+class DatabaseConfig(BaseModel):
+    """Async engine / connection pool settings (per worker process)."""
+
+    pool_size: int = Field(default=5, ge=1, description="Persistent connections kept open.")
+    max_overflow: int = Field(default=10, ge=0, description="Extra connections allowed under load.")
+    pool_timeout: float = Field(default=30.0, gt=0, description="Seconds to wait for a connection.")
+    pool_recycle: int = Field(default=1800, description="Reconnect connections older than this (s).")
+    pool_pre_ping: bool = Field(default=True, description="Test connections on checkout.")
+    pool_wait_warn_ms: float = Field(default=100.0, gt=0, description="Warn when a checkout waits longer.")
+    echo: bool = Field(default=False, description="Log every SQL statement (never in production).")
+
+
+class LogQueueConfig(BaseModel):
+    """Queued (non-blocking) log pipeline settings."""
+
+    enabled: bool = Field(
+        default=False,
+        description="Write log records from a background thread instead of the caller.",
+    )
+    max_size: int = Field(default=10_000, gt=0, description="Max records buffered in memory.")
+    batch_size: int = Field(default=256, gt=0, description="Max records per write/flush.")
+    overflow_policy: Literal["drop_debug_first", "block"] = Field(
+        default="drop_debug_first",
+        description="What to do when the buffer is full.",
+    )
+
+
+class AccessLogConfig(BaseModel):
+    """Access log sampling settings (errors, slow and debug requests are always kept)."""
+
+    sample_rate: float = Field(
+        default=1.0, ge=0.0, le=1.0, description="Default fraction of requests logged."
+    )
+    route_sample_rates: dict[str, float] = Field(
+        default_factory=dict,
+        description="Per-route-template overrides, e.g. {'/api/v1/users/{user_id}': 0.01}.",
+    )
+    max_lines_per_second: int | None = Field(
+        default=None, gt=0, description="Adaptive cap; rates are scaled down to stay under it."
+    )
 
 
 class Settings(BaseSettings):
@@ -49,17 +111,17 @@ class Settings(BaseSettings):
 
     Priority (highest -> lowest):
       1. Environment variables
-      2. YAML config file (config.{ENV}.yaml)
+      2. YAML config file (config.{ENV}.yaml), or the JSON snapshot
+         named by CONFIG_SNAPSHOT when set
       3. Field defaults
     """
 
-    model_config = ConfigDict(
-        yaml_file=str(_CONFIG_PATH),
-    )
-
     env: Env = Field(default=_ENV, description="Runtime environment name.")
     log_level: LogLevel = Field(default="INFO", description="Python logging level.")
     embedding: EmbeddingConfig = Field(default_factory=EmbeddingConfig)
+    database: DatabaseConfig = Field(default_factory=DatabaseConfig)
+    log_queue: LogQueueConfig = Field(default_factory=LogQueueConfig)
+    access_log: AccessLogConfig = Field(default_factory=AccessLogConfig)
 
     @classmethod
     def settings_customise_sources(
@@ -70,7 +132,17 @@ class Settings(BaseSettings):
         dotenv_settings: PydanticBaseSettingsSource,
         file_secret_settings: PydanticBaseSettingsSource,
     ) -> tuple[PydanticBaseSettingsSource, ...]:
-        """Override source priority: env vars -> YAML -> defaults."""
+        """Override source priority: env vars -> YAML (or snapshot) -> defaults."""
+        if _SNAPSHOT_PATH:
+            # json.loads instead of a YAML parse; PyYAML is never imported
+            if not Path(_SNAPSHOT_PATH).is_file():
+                raise FileNotFoundError(f"Config snapshot not found: {_SNAPSHOT_PATH}")
+            return (
+                init_settings,
+                env_settings,
+                JsonConfigSettingsSource(settings_cls, json_file=Path(_SNAPSHOT_PATH)),
+                file_secret_settings,
+            )
         if not _CONFIG_PATH.is_file():
             raise FileNotFoundError(
                 f"Config file not found: {_CONFIG_PATH}\n"
@@ -84,8 +156,25 @@ class Settings(BaseSettings):
         )
 
 
-# Singleton — instantiated once at module load
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """The settings singleton (cached, so every caller shares one instance)."""
+    return Settings()
+
+
+def write_snapshot(path: Path) -> None:
+    """Write the fully resolved settings as JSON (run at image build time).
+
+    The snapshot holds every value, including ones that came from env vars
+    at build time, so keep it out of version control like any config file.
+    """
+    Path(path).write_text(Settings().model_dump_json(indent=2))
+
+
+# Singleton — instantiated once at module load. The logger is configured at
+# import and needs it, so startup pays for Settings() either way; the JSON
+# snapshot is what makes that cheap.
+settings = get_settings()
 
 
 # -------------------------------------------------------------------
@@ -95,31 +184,73 @@ settings = Settings()
 #
 # embedding:
 #   api_base_url: "http://localhost:8080"
+#   max_connections: 20
+#   max_keepalive_connections: 10
+#   http2: true
+#   batch_max_size: 64
+#   batch_max_wait_ms: 5
+#   cache_max_entries: 50000
+#   cache_dir: "/var/cache/my-service/embeddings"
+#   dimension: 768
+#
+# database:
+#   pool_size: 10
+#   max_overflow: 5
+#   pool_timeout: 10
+#   pool_recycle: 1800
+#   pool_pre_ping: true
+#   pool_wait_warn_ms: 50
+#   echo: false
+#
+# log_queue:
+#   enabled: true
+#   max_size: 10000
+#   batch_size: 256
+#   overflow_policy: "drop_debug_first"   # or "block"
+#
+# access_log:
+#   sample_rate: 0.1
+#   route_sample_rates:
+#     "/api/v1/users/{user_id}": 0.01
+#   max_lines_per_second: 500
 
 
 # -------------------------------------------------------------------
 # core/config/__init__.py
 # -------------------------------------------------------------------
-# from app.core.config.config import settings
+# from app.core.config.config import Settings, get_settings, settings
 #
-# __all__ = ["settings"]
+# __all__ = ["Settings", "get_settings", "settings"]
+
+
+# -------------------------------------------------------------------
+# Usage: config snapshot for faster cold start (Dockerfile)
+# -------------------------------------------------------------------
+# # Resolve YAML once at build time; pods then only json.loads the result.
+# # Env vars set at runtime still override snapshot values.
+# ENV ENV=live
+# RUN python -c "from app.core.config.config import write_snapshot; \
+#     write_snapshot('/app/config.snapshot.json')"
+# ENV CONFIG_SNAPSHOT=/app/config.snapshot.json
 
 
 # -------------------------------------------------------------------
 # Usage: inject config via lifespan (main.py)
 # -------------------------------------------------------------------
-# from app.core.config import settings
+# from app.core.config import get_settings
 #
 # @asynccontextmanager
 # async def lifespan(app: FastAPI) -> AsyncIterator[None]:
 #     """Manage application startup and shutdown resources."""
-#     http_client = httpx.AsyncClient(base_url=settings.embedding.api_base_url)
-#     app.state.embedding_client = EmbeddingClient(http_client=http_client)
+#     settings = get_settings()
+#     http_client = build_http_client(settings.embedding)  # See embedding_client.py
+#     app.state.embedding_client = EmbeddingClient(http_client, settings.embedding)
 #     yield
+#     await app.state.embedding_client.aclose()
 #     await http_client.aclose()
 #
 # def create_app() -> FastAPI:
-#     logger.info(f"Starting application in {settings.env} environment")
+#     logger.info(f"Starting application in {get_settings().env} environment")
 #     app = FastAPI(title="My Service", lifespan=lifespan)
 #     return app
 
@@ -127,9 +258,10 @@ settings = Settings()
 # -------------------------------------------------------------------
 # Usage: configure logger from settings (core/logging/logger.py)
 # -------------------------------------------------------------------
-# from app.core.config import settings
+# from app.core.config import get_settings
 #
 # def _setup_logger() -> logging.Logger:
+#     settings = get_settings()
 #     log = logging.getLogger("my-service")
 #     log.setLevel(getattr(logging, settings.log_level, logging.INFO))
 #
@@ -140,3 +272,10 @@ settings = Settings()
 #     return log
 #
 # logger = _setup_logger()
+
+
+# -------------------------------------------------------------------
+# Usage: size the connection pool from settings (core/database.py)
+# -------------------------------------------------------------------
+# _create_engine (app_setup.py) reads `get_settings().database` directly; the
+# env-only Settings there declares the same DatabaseConfig shape.
@@ -1,31 +1,147 @@
 # Pattern 2: CRUD Repository Pattern
 # - Generic base repository with type-safe CRUD
+# - Batched multi-row INSERT / upsert for bulk ingest
+# - Single-statement update/delete by ID (UPDATE ... RETURNING)
+# - Keyset (cursor) pagination with signed, opaque cursor tokens
+# - Server-side-cursor streaming of whole tables in constant memory
+# - Optional read-through cache for get() with automatic invalidation
+# - Request-scoped batching of get() calls into one WHERE id IN (...) query
 # - Domain-specific repository extending base
 
 # -------------------------------------------------------------------
 # repositories/base_repository.py
 # -------------------------------------------------------------------
-from typing import Generic, TypeVar, Type, Optional, List
+from typing import Any, AsyncIterator, Dict, Generic, TypeVar, Type, Optional, List, Sequence, Tuple, Union
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from pydantic import BaseModel
 
+from app.core.cache import CacheBackend, restore, snapshot
+from app.core.database import after_commit
+from app.core.loader import BatchLoader
+from app.core.pagination import encode_cursor, decode_cursor
+
 ModelType = TypeVar("ModelType")
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+# Postgres caps a statement at 32767 bind parameters, so keep
+# rows-per-statement * columns-per-row comfortably below that.
+DEFAULT_BATCH_SIZE = 1000
+
 class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """Base repository for CRUD operations."""
 
-    def __init__(self, model: Type[ModelType]):
+    def __init__(
+        self,
+        model: Type[ModelType],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        cache: Optional[CacheBackend] = None,
+        batch_loads: bool = False
+    ):
         self.model = model
+        self.batch_size = batch_size
+        self.cache = cache
+        self.batch_loads = batch_loads
+        try:
+            self._id_type = model.id.type.python_type
+        except NotImplementedError:
+            self._id_type = None
+
+    def _coerce_id(self, id: Any) -> Any:
+        """Convert ``id`` to the primary key's Python type (``"5"`` -> ``5``).
+
+        The identity map and the batch loader key rows by the column's
+        type, so an ID straight from a JWT claim would otherwise never match.
+        """
+        if self._id_type is None or isinstance(id, self._id_type):
+            return id
+        return self._id_type(id)
+
+    def _cache_key(self, id: int) -> str:
+        return f"{self.model.__tablename__}:{id}"
+
+    def _cacheable(self, query):
+        # Rows that fill the cache are read from the primary: a replica may
+        # still hold a version older than a write this process just made
+        if self.cache is None:
+            return query
+        return query.execution_options(use_primary=True)
+
+    async def _invalidate(self, db: AsyncSession, *ids: int) -> None:
+        """Evict ``ids`` now and again once ``db`` commits.
+
+        Until the COMMIT, a concurrent ``get()`` on another session still
+        reads the old row and may cache it; the second pass drops that copy.
+        """
+        await self._evict(*ids)
+        after_commit(db, lambda: self._evict(*ids))
+
+    async def _evict(self, *ids: int) -> None:
+        if self.cache is not None:
+            for id in ids:
+                await self.cache.delete(self._cache_key(id))
 
     async def get(self, db: AsyncSession, id: int) -> Optional[ModelType]:
-        """Get by ID."""
+        """Get by ID (read-through when a cache is configured)."""
+        id = self._coerce_id(id)
+        if self.cache is not None:
+            # Rows already loaded in this session win over the cache so
+            # pending in-session changes are never overwritten.
+            loaded = db.identity_map.get(db.identity_key(self.model, id))
+            if loaded is not None:
+                return loaded
+            data = await self.cache.get(self._cache_key(id))
+            if data is not None:
+                # Attach the cached row to the session without a SELECT
+                return await db.merge(restore(self.model, data), load=False)
+
+        if self.batch_loads:
+            return await self._loader(db).load(id)
+
         result = await db.execute(
-            select(self.model).where(self.model.id == id)
+            self._cacheable(select(self.model).where(self.model.id == id))
         )
-        return result.scalars().first()
+        obj = result.scalars().first()
+        if obj is not None and self.cache is not None:
+            await self.cache.set(self._cache_key(id), snapshot(obj))
+        return obj
+
+    async def get_by_ids(self, db: AsyncSession, ids: Sequence[int]) -> Dict[int, ModelType]:
+        """Get many records by ID with one ``WHERE id IN (...)`` per batch."""
+        found: Dict[int, ModelType] = {}
+        for chunk in _chunks(list(ids), self.batch_size):
+            result = await db.execute(
+                self._cacheable(select(self.model).where(self.model.id.in_(chunk)))
+            )
+            for obj in result.scalars().all():
+                found[obj.id] = obj
+                if self.cache is not None:
+                    await self.cache.set(self._cache_key(obj.id), snapshot(obj))
+        return found
+
+    async def warm_cache(self, db: AsyncSession, limit: int) -> int:
+        """Load the ``limit`` newest rows (by ID) into the read-through cache."""
+        if self.cache is None or limit <= 0:
+            return 0
+        result = await db.execute(
+            self._cacheable(select(self.model).order_by(self.model.id.desc()).limit(limit))
+        )
+        rows = result.scalars().all()
+        for obj in rows:
+            await self.cache.set(self._cache_key(obj.id), snapshot(obj))
+        return len(rows)
+
+    def _loader(self, db: AsyncSession) -> BatchLoader:
+        """The session's loader for this model, created on first use."""
+        loaders = db.info.setdefault("loaders", {})
+        loader = loaders.get(self.model)
+        if loader is None:
+            loader = loaders[self.model] = BatchLoader(
+                lambda ids: self.get_by_ids(db, ids)
+            )
+        return loader
 
     async def get_multi(
         self,
@@ -39,18 +155,152 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         )
         return result.scalars().all()
 
+    async def get_page(
+        self,
+        db: AsyncSession,
+        after: Optional[str] = None,
+        limit: int = 100,
+        order_by: Sequence[str] = ("id",)
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """Get one page of records after a cursor (keyset pagination).
+
+        Uses ``WHERE (k1, k2, ...) > (:last1, :last2, ...)`` instead of
+        OFFSET, so page 5000 costs the same as page 1 given an index on
+        the ``order_by`` columns. ``id`` is appended as a tie-breaker when
+        missing so the ordering is total. Returns ``(items, next_cursor)``;
+        ``next_cursor`` is ``None`` on the last page.
+        """
+        keys = list(order_by) if "id" in order_by else [*order_by, "id"]
+        columns = [getattr(self.model, key) for key in keys]
+
+        query = select(self.model).order_by(*columns).limit(limit + 1)
+        if after is not None:
+            last_values = decode_cursor(after, keys)
+            query = query.where(tuple_(*columns) > tuple_(*last_values))
+
+        result = await db.execute(query)
+        items = result.scalars().all()
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor(
+                keys, [getattr(items[-1], key) for key in keys]
+            )
+        return items, next_cursor
+
+    async def stream_all(
+        self,
+        db: AsyncSession,
+        chunk_size: int = 1000
+    ) -> AsyncIterator[List[ModelType]]:
+        """Yield every record, ``chunk_size`` at a time, ordered by ID.
+
+        Rows come from a server-side cursor (``stream_scalars`` with
+        ``yield_per``), so memory stays flat however large the table is.
+        The cursor holds a connection until iteration ends; callers should
+        consume promptly or use a dedicated session.
+        """
+        result = await db.stream_scalars(
+            select(self.model)
+            .order_by(self.model.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        async for chunk in result.partitions():
+            yield chunk
+
     async def create(
         self,
         db: AsyncSession,
-        obj_in: CreateSchemaType
+        obj_in: Union[CreateSchemaType, Dict[str, Any]]
     ) -> ModelType:
-        """Create new record."""
-        db_obj = self.model(**obj_in.dict())
+        """Create new record (one ``INSERT ... RETURNING`` where supported).
+
+        Unique-constraint violations surface as ``IntegrityError``.
+        """
+        values = obj_in if isinstance(obj_in, dict) else obj_in.dict()
+        if db.get_bind().dialect.insert_returning:
+            result = await db.execute(
+                insert(self.model).values(**values).returning(self.model)
+            )
+            return result.scalars().one()
+
+        db_obj = self.model(**values)
         db.add(db_obj)
         await db.flush()
         await db.refresh(db_obj)
         return db_obj
 
+    async def create_many(
+        self,
+        db: AsyncSession,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        batch_size: Optional[int] = None
+    ) -> List[ModelType]:
+        """Create records with one multi-row INSERT ... RETURNING per batch.
+
+        Backends without INSERT ... RETURNING flush each batch as an
+        executemany, then reload it with one SELECT (server defaults).
+        """
+        rows = [obj_in if isinstance(obj_in, dict) else obj_in.dict() for obj_in in objs_in]
+        returning = db.get_bind().dialect.insert_returning
+        created: List[ModelType] = []
+        for chunk in _chunks(rows, batch_size or self.batch_size):
+            if returning:
+                result = await db.execute(
+                    insert(self.model).values(chunk).returning(self.model)
+                )
+                created.extend(result.scalars().all())
+                continue
+            db_objs = [self.model(**values) for values in chunk]
+            db.add_all(db_objs)
+            await db.flush()
+            result = await db.execute(
+                select(self.model)
+                .where(self.model.id.in_([obj.id for obj in db_objs]))
+                .order_by(self.model.id)
+                .execution_options(populate_existing=True)
+            )
+            created.extend(result.scalars().all())
+        return created
+
+    async def upsert_many(
+        self,
+        db: AsyncSession,
+        objs_in: Sequence[CreateSchemaType],
+        index_elements: Sequence[str],
+        update_fields: Optional[Sequence[str]] = None,
+        batch_size: Optional[int] = None
+    ) -> List[ModelType]:
+        """Insert or update records with INSERT ... ON CONFLICT ... RETURNING.
+
+        ``index_elements`` must match a unique index (e.g. ``["email"]``).
+        On conflict every non-key column is overwritten unless
+        ``update_fields`` narrows it down.
+        """
+        rows = [obj_in.dict() for obj_in in objs_in]
+        if not rows:
+            return []
+        dialect_insert = _dialect_insert(db)
+        fields = update_fields or [
+            key for key in rows[0] if key not in index_elements
+        ]
+        upserted: List[ModelType] = []
+        for chunk in _chunks(rows, batch_size or self.batch_size):
+            stmt = dialect_insert(self.model).values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=index_elements,
+                set_={field: stmt.excluded[field] for field in fields},
+            )
+            # populate_existing refreshes rows already in the identity map
+            result = await db.execute(
+                stmt.returning(self.model),
+                execution_options={"populate_existing": True},
+            )
+            upserted.extend(result.scalars().all())
+        await self._invalidate(db, *(obj.id for obj in upserted))
+        return upserted
+
     async def update(
         self,
         db: AsyncSession,
@@ -63,6 +313,7 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             setattr(db_obj, field, value)
         await db.flush()
         await db.refresh(db_obj)
+        await self._invalidate(db, db_obj.id)
         return db_obj
 
     async def delete(self, db: AsyncSession, id: int) -> bool:
@@ -70,13 +321,294 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj = await self.get(db, id)
         if obj:
             await db.delete(obj)
+            await self._invalidate(db, id)
             return True
         return False
 
+    async def update_by_id(
+        self,
+        db: AsyncSession,
+        id: int,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> Optional[ModelType]:
+        """Update by ID with one ``UPDATE ... RETURNING``; None if no row matched.
+
+        Backends without UPDATE ... RETURNING (MySQL) fall back to UPDATE
+        followed by a SELECT.
+        """
+        values = obj_in if isinstance(obj_in, dict) else obj_in.dict(exclude_unset=True)
+        if not values:
+            return await self.get(db, id)
+
+        stmt = update(self.model).where(self.model.id == id).values(**values)
+        if db.get_bind().dialect.update_returning:
+            # populate_existing refreshes the row if it is already in the session
+            result = await db.execute(
+                stmt.returning(self.model),
+                execution_options={"populate_existing": True},
+            )
+            obj = result.scalars().first()
+        else:
+            result = await db.execute(stmt)
+            obj = None
+            if result.rowcount:
+                result = await db.execute(
+                    select(self.model)
+                    .where(self.model.id == id)
+                    .execution_options(populate_existing=True)
+                )
+                obj = result.scalars().first()
+        await self._invalidate(db, id)
+        return obj
+
+    async def delete_by_id(self, db: AsyncSession, id: int) -> bool:
+        """Delete by ID with one ``DELETE`` statement."""
+        result = await db.execute(
+            delete(self.model).where(self.model.id == id)
+        )
+        await self._invalidate(db, id)
+        return result.rowcount > 0
+
+
+def _chunks(rows: list, size: int):
+    """Yield successive ``size``-sized slices of ``rows``."""
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+def _dialect_insert(db: AsyncSession):
+    """Return the dialect-specific ``insert`` that supports ON CONFLICT."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"upsert_many is not supported on {dialect}")
+
+
+# -------------------------------------------------------------------
+# core/pagination.py
+# -------------------------------------------------------------------
+import base64
+import hashlib
+import hmac
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List
+from uuid import UUID
+
+from app.core.config import get_settings
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor is malformed, tampered with or reused with another ordering."""
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+def _sign(payload: str) -> str:
+    key = get_settings().SECRET_KEY.encode()
+    digest = hmac.new(key, payload.encode(), hashlib.sha256).digest()
+    return _b64encode(digest[:16])
+
+# Key column types JSON cannot carry, as (tag, type, to_str, from_str);
+# datetime precedes date because it is a subclass of it
+_TAGGED_TYPES = [
+    ("$dt", datetime, datetime.isoformat, datetime.fromisoformat),
+    ("$d", date, date.isoformat, date.fromisoformat),
+    ("$dec", Decimal, str, Decimal),
+    ("$uuid", UUID, str, UUID),
+]
+
+def _encode_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    for tag, type_, to_str, _ in _TAGGED_TYPES:
+        if isinstance(value, type_):
+            return {tag: to_str(value)}
+    raise TypeError(f"Cannot store a {type(value).__name__} key in a cursor")
+
+def _decode_value(value: Any) -> Any:
+    if not isinstance(value, dict):
+        return value
+    for tag, _, _, from_str in _TAGGED_TYPES:
+        if tag in value:
+            try:
+                return from_str(value[tag])
+            except Exception as e:  # The constructors raise assorted types (InvalidOperation, ...)
+                raise InvalidCursorError("Invalid cursor") from e
+    raise InvalidCursorError("Invalid cursor")
+
+def encode_cursor(keys: List[str], values: List[Any]) -> str:
+    """Build an opaque, HMAC-signed cursor from the last row's key values."""
+    body = json.dumps(
+        {"k": keys, "v": [_encode_value(v) for v in values]},
+        separators=(",", ":"),
+    )
+    payload = _b64encode(body.encode())
+    return f"{payload}.{_sign(payload)}"
+
+def decode_cursor(cursor: str, keys: List[str]) -> List[Any]:
+    """Verify a cursor and return its key values in ``keys`` order."""
+    payload, _, signature = cursor.partition(".")
+    if not hmac.compare_digest(signature.encode(), _sign(payload).encode()):
+        raise InvalidCursorError("Invalid cursor")
+    try:
+        data = json.loads(_b64decode(payload))
+    except ValueError as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+    if data.get("k") != keys or len(data.get("v", [])) != len(keys):
+        raise InvalidCursorError("Cursor does not match the requested ordering")
+    return [_decode_value(v) for v in data["v"]]
+
+
+# -------------------------------------------------------------------
+# core/cache.py
+# -------------------------------------------------------------------
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Protocol, Tuple, Type
+
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+class CacheBackend(Protocol):
+    """Minimal async key/value interface a cache backend must provide.
+
+    ``LRUCache`` is the in-process default; a Redis (or any Redis-like
+    stand-in) adapter only needs these three coroutines plus a way to
+    serialize the column dicts produced by ``snapshot``.
+    """
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]: ...
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None: ...
+
+    async def delete(self, key: str) -> None: ...
+
+@dataclass
+class CacheStats:
+    """Counters exposed by a cache backend."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+class LRUCache:
+    """In-process LRU cache with a size bound and per-entry TTL."""
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._data: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+def snapshot(obj: Any) -> Dict[str, Any]:
+    """Copy an ORM object's column values into a plain dict."""
+    return {
+        attr.key: getattr(obj, attr.key)
+        for attr in sa_inspect(obj).mapper.column_attrs
+    }
+
+def restore(model: Type[Any], data: Dict[str, Any]) -> Any:
+    """Rebuild a detached ORM object from a ``snapshot`` dict (no SQL)."""
+    obj = sa_inspect(model).class_manager.new_instance()
+    for key, value in data.items():
+        set_committed_value(obj, key, value)
+    make_transient_to_detached(obj)
+    return obj
+
+
+# -------------------------------------------------------------------
+# core/loader.py
+# -------------------------------------------------------------------
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+
+class BatchLoader:
+    """DataLoader-style batcher: one ``batch_fn`` call per event-loop tick.
+
+    Every ``load(key)`` issued before the loop gets back to its scheduled
+    callbacks joins the same batch, and repeated keys share one future.
+    So ``asyncio.gather(*(repo.get(db, i) for i in ids))`` runs one query
+    instead of ``len(ids)``. ``batch_fn`` receives the unique keys and
+    returns a ``{key: value}`` dict; keys missing from it resolve to None.
+
+    Keep one loader per session (``session.info``): the batch query runs
+    on that session, and results are never shared across requests.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]):
+        self._batch_fn = batch_fn
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def load(self, key: Hashable) -> Awaitable[Optional[Any]]:
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+            future = self._pending[key] = loop.create_future()
+        # Shielded so one cancelled caller does not fail the others sharing the key
+        return asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        batch, self._pending = self._pending, {}
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: Dict[Hashable, asyncio.Future]) -> None:
+        try:
+            results = await self._batch_fn(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(results.get(key))
+
 
 # -------------------------------------------------------------------
 # repositories/user_repository.py
 # -------------------------------------------------------------------
+from sqlalchemy import update
+
+from app.core.cache import LRUCache
+from app.core.principal_cache import principal_cache
 from app.repositories.base_repository import BaseRepository
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
@@ -84,6 +616,13 @@ from app.schemas.user import UserCreate, UserUpdate
 class UserRepository(BaseRepository[User, UserCreate, UserUpdate]):
     """User-specific repository."""
 
+    async def _evict(self, *ids: int) -> None:
+        # Cached principals hold a copy of the row too (password hash, is_active),
+        # so every write path (update, delete, upsert, rehash) revokes them
+        await super()._evict(*ids)
+        for id in ids:
+            principal_cache.invalidate_user(id)
+
     async def get_by_email(self, db: AsyncSession, email: str) -> Optional[User]:
         """Get user by email."""
         result = await db.execute(
@@ -91,9 +630,34 @@ class UserRepository(BaseRepository[User, UserCreate, UserUpdate]):
         )
         return result.scalars().first()
 
+    async def replace_password_hash(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        old_hash: str,
+        new_hash: str
+    ) -> bool:
+        """Swap a password hash only if it is still ``old_hash``.
+
+        The compare-and-set keeps a background rehash from overwriting a
+        password change that committed in the meantime.
+        """
+        result = await db.execute(
+            update(User)
+            .where(User.id == user_id, User.hashed_password == old_hash)
+            .values(hashed_password=new_hash)
+            .execution_options(synchronize_session=False)
+        )
+        await self._invalidate(db, user_id)
+        return result.rowcount > 0
+
     async def is_active(self, db: AsyncSession, user_id: int) -> bool:
         """Check if user is active."""
         user = await self.get(db, user_id)
         return user.is_active if user else False
 
-user_repository = UserRepository(User)
+# Hot user rows are served from memory; update/delete invalidate them.
+# Concurrent get() calls within a request share one IN (...) query.
+user_repository = UserRepository(
+    User, cache=LRUCache(maxsize=10_000, ttl=30.0), batch_loads=True
+)
@@ -0,0 +1,488 @@
+# Pattern 9: Embedding API Client (pooled + micro-batched)
+# - One shared httpx.AsyncClient: connection limits, keep-alive, optional HTTP/2
+# - Micro-batching: concurrent single-text embed() calls become one upstream request
+# - Content-addressed cache: LRU memory tier + mmap float32 disk tier, single-flight
+# - Built from settings.embedding in the lifespan, closed on shutdown
+#
+# Upstream contract (adapt _post_batch to your provider):
+#   POST /embed  {"model": "...", "texts": ["a", "b"]}  ->  {"embeddings": [[...], [...]]}
+#
+# Directory structure:
+#   app/infra/client/
+#   ├── http.py                 # build_http_client(EmbeddingConfig)
+#   ├── micro_batcher.py        # MicroBatcher (time/size-bounded coalescing)
+#   ├── embedding_client.py     # EmbeddingClient
+#   ├── vector_store.py         # DiskVectorStore (packed float32, memory-mapped)
+#   └── embedding_cache.py      # CachedEmbeddingClient (memory -> disk -> upstream)
+
+# -------------------------------------------------------------------
+# Step 1: Pooled HTTP client (infra/client/http.py)
+# -------------------------------------------------------------------
+import httpx
+
+from app.core.config.config import EmbeddingConfig
+
+
+def build_http_client(config: EmbeddingConfig) -> httpx.AsyncClient:
+    """Shared AsyncClient for the embedding API.
+
+    Keep-alive connections skip the TCP/TLS handshake on every call, and
+    ``max_connections`` bounds concurrent upstream requests (callers wait
+    for a free connection up to ``pool_timeout``). HTTP/2 multiplexes
+    requests over one connection and needs the ``h2`` package
+    (``pip install httpx[http2]``).
+    """
+    return httpx.AsyncClient(
+        base_url=config.api_base_url,
+        http2=config.http2,
+        limits=httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(config.timeout, pool=config.pool_timeout),
+    )
+
+
+# -------------------------------------------------------------------
+# Step 2: Micro-batcher (infra/client/micro_batcher.py)
+# -------------------------------------------------------------------
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """Coalesce concurrent single-item calls into batched calls.
+
+    The first ``submit`` opens a window of ``max_wait_ms``; everything
+    submitted before it closes (or until ``max_size`` items arrive) goes
+    to one ``batch_fn`` call, whose results are fanned back out by
+    position. A failed batch fails every caller in it.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[list[T]], Awaitable[list[R]]],
+        max_size: int = 64,
+        max_wait_ms: float = 5.0,
+    ) -> None:
+        self._batch_fn = batch_fn
+        self.max_size = max_size
+        self.max_wait_ms = max_wait_ms
+        self._items: list[T] = []
+        self._futures: list[asyncio.Future] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def submit(self, item: T) -> Awaitable[R]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._items.append(item)
+        self._futures.append(future)
+        if len(self._items) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+        return future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._items:
+            return
+        items, futures = self._items, self._futures
+        self._items, self._futures = [], []
+        task = asyncio.ensure_future(self._run(items, futures))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, items: list[T], futures: list[asyncio.Future]) -> None:
+        try:
+            results = await self._batch_fn(items)
+            if len(results) != len(items):
+                raise ValueError(f"Batch returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, result in zip(futures, results):
+            if not future.done():  # Caller may have been cancelled
+                future.set_result(result)
+
+    async def aclose(self) -> None:
+        """Send whatever is queued and wait for in-flight batches."""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+# -------------------------------------------------------------------
+# Step 3: Embedding client (infra/client/embedding_client.py)
+# -------------------------------------------------------------------
+import httpx
+
+from app.core.config.config import EmbeddingConfig
+from app.infra.client.micro_batcher import MicroBatcher
+
+
+class EmbeddingClient:
+    """Embedding API client: direct batch calls plus a micro-batched ``embed``."""
+
+    def __init__(self, http_client: httpx.AsyncClient, config: EmbeddingConfig) -> None:
+        self._http = http_client
+        self.model = config.model
+        self.max_batch_size = config.batch_max_size
+        self._batcher: MicroBatcher[str, list[float]] | None = None
+        if config.batch_enabled:
+            self._batcher = MicroBatcher(
+                self.embed_many,
+                max_size=config.batch_max_size,
+                max_wait_ms=config.batch_max_wait_ms,
+            )
+
+    async def embed(self, text: str) -> list[float]:
+        """Embed one text; concurrent calls share upstream requests."""
+        if self._batcher is None:
+            return (await self.embed_many([text]))[0]
+        return await self._batcher.submit(text)
+
+    async def embed_many(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts, one upstream request per ``batch_max_size`` unique texts."""
+        unique = list(dict.fromkeys(texts))  # Repeated texts are sent once
+        vectors: dict[str, list[float]] = {}
+        for start in range(0, len(unique), self.max_batch_size):
+            chunk = unique[start:start + self.max_batch_size]
+            vectors.update(zip(chunk, await self._post_batch(chunk)))
+        return [vectors[text] for text in texts]
+
+    async def _post_batch(self, texts: list[str]) -> list[list[float]]:
+        response = await self._http.post("/embed", json={"model": self.model, "texts": texts})
+        response.raise_for_status()
+        return response.json()["embeddings"]
+
+    async def aclose(self) -> None:
+        """Flush pending micro-batches; the owner closes the HTTP client."""
+        if self._batcher is not None:
+            await self._batcher.aclose()
+
+
+# -------------------------------------------------------------------
+# Step 4: Disk tier (infra/client/vector_store.py)
+# -------------------------------------------------------------------
+import fcntl
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+
+_MAGIC = b"EMBV"
+_HEADER = struct.Struct("<4sII")  # magic, format version, dimension
+_KEY_BYTES = 32                   # sha256 digest
+
+
+class DiskVectorStore:
+    """Append-only vector store: packed float32 rows read through ``mmap``.
+
+    ``vectors.f32`` holds a header and then one ``dimension * 4`` byte row
+    per entry. ``index.bin`` holds the matching 32-byte keys in the same
+    order, so the key -> row map is rebuilt at open with one read. 1M
+    vectors of 768 dims take 3 GB on disk (JSON would take ~5x that), and
+    reads are page-cache hits once warm.
+
+    Row N always belongs to key N. Rows are written before their key, so
+    a crash can leave a trailing row (whole or torn) without a key; open
+    truncates both files back to the last complete pair, so later appends
+    cannot pair a key with an orphaned row. Appends hold an ``flock`` so
+    worker processes can share one directory; each process sees other
+    workers' entries after its next restart. ``put`` does blocking I/O:
+    call it off the event loop.
+    """
+
+    def __init__(self, directory: str | Path, dimension: int) -> None:
+        self.dimension = dimension
+        self._row_bytes = dimension * 4
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        # Read-write, not append: writes go to the slot's offset, over any leftovers
+        self._data = open(os.open(path / "vectors.f32", os.O_RDWR | os.O_CREAT, 0o644), "r+b")
+        self._index = open(os.open(path / "index.bin", os.O_RDWR | os.O_CREAT, 0o644), "r+b")
+        self._mmap: mmap.mmap | None = None
+        self._slots: dict[bytes, int] = {}
+        self._lock = threading.Lock()  # flock does not exclude threads sharing one fd
+
+        with self._locked():
+            if os.fstat(self._data.fileno()).st_size < _HEADER.size:
+                self._data.seek(0)
+                self._data.write(_HEADER.pack(_MAGIC, 1, dimension))
+                self._data.flush()
+            self._data.seek(0)
+            magic, _, stored_dimension = _HEADER.unpack(self._data.read(_HEADER.size))
+            if magic != _MAGIC or stored_dimension != dimension:
+                raise ValueError(f"{path} holds {stored_dimension}-dim vectors, expected {dimension}")
+
+            self._index.seek(0)
+            keys = self._index.read()
+            rows = (os.fstat(self._data.fileno()).st_size - _HEADER.size) // self._row_bytes
+            count = min(len(keys) // _KEY_BYTES, rows)
+            # Drop whatever a crashed append left behind (orphaned or torn rows/keys)
+            self._data.truncate(_HEADER.size + count * self._row_bytes)
+            self._index.truncate(count * _KEY_BYTES)
+        for slot in range(count):
+            self._slots[keys[slot * _KEY_BYTES:(slot + 1) * _KEY_BYTES]] = slot
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def get(self, key: bytes) -> list[float] | None:
+        slot = self._slots.get(key)
+        if slot is None:
+            return None
+        offset = _HEADER.size + slot * self._row_bytes
+        if self._mmap is None or offset + self._row_bytes > len(self._mmap):
+            self._remap()  # File grew since the last mapping
+        return memoryview(self._mmap)[offset:offset + self._row_bytes].cast("f").tolist()
+
+    def put(self, key: bytes, vector: list[float]) -> None:
+        if key in self._slots:
+            return
+        if len(vector) != self.dimension:
+            raise ValueError(f"Expected {self.dimension}-dim vector, got {len(vector)}")
+        row = struct.pack(f"<{self.dimension}f", *vector)
+        with self._locked():
+            # The key count (not the data size) is the slot: rows past it are unindexed
+            slot = os.fstat(self._index.fileno()).st_size // _KEY_BYTES
+            self._data.seek(_HEADER.size + slot * self._row_bytes)
+            self._data.write(row)
+            self._data.flush()
+            self._index.seek(slot * _KEY_BYTES)
+            self._index.write(key)
+            self._index.flush()
+        self._slots[key] = slot
+
+    def _remap(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+        self._mmap = mmap.mmap(self._data.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _locked(self):
+        return _FileLock(self._index, self._lock)
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+        self._data.close()
+        self._index.close()
+
+
+class _FileLock:
+    """Exclusive ``flock`` (across processes) plus a thread lock (within one)."""
+
+    def __init__(self, file, lock: threading.Lock) -> None:
+        self._file = file
+        self._lock = lock
+
+    def __enter__(self) -> None:
+        self._lock.acquire()
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+
+    def __exit__(self, *exc) -> None:
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._lock.release()
+
+
+# -------------------------------------------------------------------
+# Step 5: Cached client (infra/client/embedding_cache.py)
+# -------------------------------------------------------------------
+import asyncio
+import hashlib
+import unicodedata
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.core.config.config import EmbeddingConfig
+from app.infra.client.embedding_client import EmbeddingClient
+from app.infra.client.vector_store import DiskVectorStore
+
+
+def normalize_text(text: str) -> str:
+    """NFC-normalize so canonically equal strings share one cache entry."""
+    return unicodedata.normalize("NFC", text)
+
+
+def cache_key(model: str, text: str) -> bytes:
+    """Content address of one embedding: sha256(model, normalized text)."""
+    return hashlib.sha256(f"{model}\0{text}".encode()).digest()
+
+
+@dataclass
+class EmbeddingCacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0    # Misses that joined an in-flight fetch of the same text
+    evictions: int = 0
+
+
+class CachedEmbeddingClient:
+    """``EmbeddingClient`` behind a memory LRU and an optional disk tier.
+
+    Lookups go memory -> disk -> upstream. Concurrent misses for the same
+    text share one fetch (single-flight), and single-text misses go
+    through the wrapped client's micro-batcher, so concurrent ``embed``
+    calls for different texts still share upstream requests. A fetch
+    runs in its own task: cancelling the caller that started it does not
+    strand the others waiting on it. Memory entries are packed
+    ``array("f")`` rows (4 bytes per dimension).
+    """
+
+    def __init__(self, client: EmbeddingClient, config: EmbeddingConfig) -> None:
+        self._client = client
+        self.model = config.model
+        self.max_entries = config.cache_max_entries
+        self.stats = EmbeddingCacheStats()
+        self._memory: OrderedDict[bytes, array] = OrderedDict()
+        self._inflight: dict[bytes, asyncio.Task] = {}
+        self._disk: DiskVectorStore | None = None
+        if config.cache_dir is not None:
+            if config.dimension is None:
+                raise ValueError("embedding.dimension is required for the disk cache")
+            self._disk = DiskVectorStore(config.cache_dir, config.dimension)
+
+    async def embed(self, text: str) -> list[float]:
+        return (await self.embed_many([text]))[0]
+
+    async def embed_many(self, texts: list[str]) -> list[list[float]]:
+        normalized = [normalize_text(text) for text in texts]
+        keys = [cache_key(self.model, text) for text in normalized]
+        results: dict[bytes, list[float]] = {}
+        pending: dict[bytes, asyncio.Task] = {}
+        to_fetch: dict[bytes, str] = {}
+
+        for key, text in zip(keys, normalized):
+            if key in results or key in pending or key in to_fetch:
+                continue
+            vector = self._lookup(key)
+            if vector is not None:
+                results[key] = vector
+            elif key in self._inflight:
+                self.stats.coalesced += 1
+                pending[key] = self._inflight[key]
+            else:
+                self.stats.misses += 1
+                to_fetch[key] = text
+
+        if to_fetch:
+            task = asyncio.ensure_future(self._fetch(to_fetch))
+            for key in to_fetch:
+                self._inflight[key] = task
+                pending[key] = task
+            task.add_done_callback(lambda done: self._fetch_done(done, to_fetch))
+        for task in set(pending.values()):
+            # shield: a cancelled caller leaves the fetch running for the others
+            fetched = await asyncio.shield(task)
+            results.update((key, fetched[key]) for key in pending if pending[key] is task)
+        return [results[key] for key in keys]
+
+    def _lookup(self, key: bytes) -> list[float] | None:
+        row = self._memory.get(key)
+        if row is not None:
+            self._memory.move_to_end(key)
+            self.stats.memory_hits += 1
+            return row.tolist()
+        if self._disk is not None:
+            vector = self._disk.get(key)
+            if vector is not None:
+                self.stats.disk_hits += 1
+                self._remember(key, vector)
+                return vector
+        return None
+
+    async def _fetch(self, to_fetch: dict[bytes, str]) -> dict[bytes, list[float]]:
+        if len(to_fetch) == 1:
+            # Single misses from concurrent callers coalesce in the micro-batcher
+            vectors = [await self._client.embed(*to_fetch.values())]
+        else:
+            vectors = await self._client.embed_many(list(to_fetch.values()))
+        fetched = dict(zip(to_fetch, vectors))
+        for key, vector in fetched.items():
+            self._remember(key, vector)
+        if self._disk is not None:
+            await asyncio.to_thread(self._persist, fetched)
+        return fetched
+
+    def _fetch_done(self, task: asyncio.Task, to_fetch: dict[bytes, str]) -> None:
+        for key in to_fetch:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved: every waiter may have been cancelled
+
+    def _persist(self, fetched: dict[bytes, list[float]]) -> None:
+        for key, vector in fetched.items():
+            self._disk.put(key, vector)
+
+    def _remember(self, key: bytes, vector: list[float]) -> None:
+        self._memory[key] = array("f", vector)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    def metrics_lines(self) -> list[str]:
+        """Prometheus counters; register with ``register_collector``."""
+        lines = [
+            "# HELP embedding_cache_lookups_total Embedding cache lookups by result.",
+            "# TYPE embedding_cache_lookups_total counter",
+        ]
+        for result in ("memory_hits", "disk_hits", "misses", "coalesced"):
+            lines.append(f'embedding_cache_lookups_total{{result="{result}"}} {getattr(self.stats, result)}')
+        lines += [
+            "# TYPE embedding_cache_evictions_total counter",
+            f"embedding_cache_evictions_total {self.stats.evictions}",
+            "# TYPE embedding_cache_entries gauge",
+            f'embedding_cache_entries{{tier="memory"}} {len(self._memory)}',
+        ]
+        if self._disk is not None:
+            lines.append(f'embedding_cache_entries{{tier="disk"}} {len(self._disk)}')
+        return lines
+
+    async def aclose(self) -> None:
+        """Let in-flight fetches finish, then close the disk tier."""
+        if self._inflight:
+            await asyncio.gather(*set(self._inflight.values()), return_exceptions=True)
+        if self._disk is not None:
+            self._disk.close()
+
+
+# -------------------------------------------------------------------
+# Step 6: Wire into lifespan (main.py)
+# -------------------------------------------------------------------
+# from app.core.config import get_settings
+# from app.core.metrics.endpoint import register_collector
+# from app.infra.client.embedding_cache import CachedEmbeddingClient
+# from app.infra.client.embedding_client import EmbeddingClient
+# from app.infra.client.http import build_http_client
+#
+# @asynccontextmanager
+# async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+#     config = get_settings().embedding
+#     http_client = build_http_client(config)
+#     client = EmbeddingClient(http_client, config)
+#     app.state.embedding_client = client
+#     if config.cache_enabled:
+#         cached = CachedEmbeddingClient(client, config)
+#         register_collector(cached.metrics_lines)
+#         app.state.embedding_client = cached  # Same embed/embed_many interface
+#     yield
+#     if config.cache_enabled:
+#         await cached.aclose()
+#     await client.aclose()
+#     await http_client.aclose()
@@ -1,7 +1,9 @@
 # Pattern 7: Structured Logging (Environment-Aware + Trace ID)
-# - JSON formatter for production, colored console for local
+# - JSON formatter for production (plus a faster drop-in variant), colored console for local
 # - Per-request trace ID propagation via ContextVar
-# - Request/response logging middleware with slow-request warnings
+# - Pure ASGI request/response logging middleware with slow-request warnings
+# - Sampled access logs: errors, slow and debug requests are always kept
+# - Optional queued pipeline: records are written by a background thread
 #
 # Directory structure:
 #   app/core/
@@ -9,6 +11,8 @@
 #   ├── logging/
 #   │   ├── logger.py               # Logger setup (env-aware formatter selection)
 #   │   ├── logger_formatter.py     # JSON formatter for production
+#   │   ├── logger_queue.py         # Bounded queue handler + batching writer thread
+#   │   ├── logger_sampling.py      # Access-log sampling (per route + adaptive cap)
 #   │   └── logger_util.py          # Shutdown helper
 #   └── middleware/
 #       └── logging.py              # Request/response logging middleware
@@ -26,6 +30,7 @@ trace_id_ctx: ContextVar[str] = ContextVar("trace_id", default="-")
 # -------------------------------------------------------------------
 import json
 import logging
+import math
 from datetime import UTC, datetime
 from typing import ClassVar
 
@@ -70,14 +75,207 @@ class JsonFormatter(logging.Formatter):
         return json.dumps(log_record, ensure_ascii=False)
 
 
+try:
+    import orjson
+except ImportError:  # Optional dependency
+    orjson = None
+
+_SCALAR_TYPES: frozenset[type] = frozenset({str, int, float, bool, type(None)})
+
+# json.dumps(..., ensure_ascii=False) builds a new JSONEncoder per call
+_encode_json = json.JSONEncoder(ensure_ascii=False).encode
+
+
+class FastJsonFormatter(JsonFormatter):
+    """High-throughput variant of ``JsonFormatter`` with identical output.
+
+    - Timestamp prefix ("YYYY-MM-DDTHH:MM:SS") is built once per second
+    - Extras are accepted on an exact-type hit before any ``isinstance`` call
+    - A pre-built encoder replaces the per-call ``json.dumps`` setup
+
+    ``use_orjson=True`` switches to orjson when it is installed. That output
+    has the same keys, values and order but compact separators, so it is not
+    byte-identical to ``JsonFormatter``.
+    """
+
+    def __init__(self, *args, use_orjson: bool = False, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._use_orjson = use_orjson and orjson is not None
+        self._ts_cache: tuple[int, str] = (-1, "")
+
+    def _timestamp(self, created: float) -> str:
+        # Same rounding as datetime.fromtimestamp (round-half-even on µs)
+        frac, whole = math.modf(created)
+        micros = round(frac * 1e6)
+        if micros >= 1_000_000:
+            whole += 1
+            micros -= 1_000_000
+        second = int(whole)
+
+        cached_second, prefix = self._ts_cache
+        if cached_second != second:
+            prefix = datetime.fromtimestamp(second, UTC).strftime("%Y-%m-%dT%H:%M:%S")
+            self._ts_cache = (second, prefix)  # Single assignment: thread-safe
+        # isoformat() omits the fraction when it is zero
+        if micros:
+            return f"{prefix}.{micros:06d}+00:00"
+        return f"{prefix}+00:00"
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format log record as a single-line JSON string."""
+        log_record = {
+            "timestamp": self._timestamp(record.created),
+            "level": self.LEVEL_MAP.get(record.levelname, record.levelname),
+            "message": record.getMessage(),
+        }
+
+        if record.exc_info:
+            log_record["error_message"] = self.formatException(record.exc_info)
+            if record.exc_info[0]:
+                log_record["error_code"] = record.exc_info[0].__name__
+
+        exclude = self.EXCLUDE_FIELDS
+        for key, value in record.__dict__.items():
+            if key in exclude:
+                continue
+            if type(value) in _SCALAR_TYPES or isinstance(value, (str, int, float, bool)):
+                log_record[key] = value
+
+        if self._use_orjson:
+            try:
+                return orjson.dumps(log_record).decode()
+            except TypeError:  # e.g. ints beyond 64 bits
+                pass
+        return _encode_json(log_record)
+
+
 # -------------------------------------------------------------------
-# Step 3: Logger setup — env-aware (core/logging/logger.py)
+# Step 3: Non-blocking queued pipeline (core/logging/logger_queue.py)
+# -------------------------------------------------------------------
+import copy
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler
+from typing import Literal
+
+OverflowPolicy = Literal["drop_debug_first", "block"]
+
+_STOP = object()
+
+
+class BatchingQueueListener(threading.Thread):
+    """Background writer that drains the log queue in batches.
+
+    Each batch is formatted, written with a single ``stream.write`` and
+    flushed once, so a slow stdout consumer only stalls this thread.
+    """
+
+    def __init__(
+        self,
+        log_queue: queue.Queue,
+        handler: logging.StreamHandler,
+        batch_size: int,
+    ) -> None:
+        super().__init__(name="log-writer", daemon=True)
+        self.queue = log_queue
+        self.handler = handler
+        self.batch_size = batch_size
+
+    def run(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = _STOP in batch
+            self._write([record for record in batch if record is not _STOP])
+            if stopping:
+                return
+
+    def _write(self, records: list[logging.LogRecord]) -> None:
+        handler = self.handler
+        lines: list[str] = []
+        last_record = None
+        for record in records:
+            if record.levelno < handler.level or not handler.filter(record):
+                continue
+            try:
+                lines.append(handler.format(record) + handler.terminator)
+                last_record = record
+            except Exception:
+                handler.handleError(record)
+        if lines:
+            with handler.lock:
+                try:
+                    handler.stream.write("".join(lines))
+                    handler.flush()
+                except Exception:
+                    # A broken stream (closed pipe, full disk) loses this batch
+                    # but must not kill the thread, or the queue fills up and
+                    # every logging call blocks or drops from then on
+                    handler.handleError(last_record)
+
+    def stop(self) -> None:
+        """Flush everything already queued, then end the thread."""
+        self.queue.put(_STOP)
+        self.join()
+
+
+class BoundedQueueHandler(QueueHandler):
+    """Enqueue records for ``BatchingQueueListener`` with an overflow policy.
+
+    - ``block``:            wait for space; nothing is ever dropped.
+    - ``drop_debug_first``: DEBUG is dropped once the queue is 80% full,
+                            INFO when it is full; WARNING and above wait.
+    """
+
+    def __init__(
+        self,
+        log_queue: queue.Queue,
+        listener: BatchingQueueListener,
+        overflow_policy: OverflowPolicy = "drop_debug_first",
+    ) -> None:
+        super().__init__(log_queue)
+        self.listener = listener
+        self.overflow_policy = overflow_policy
+        self.dropped_records = 0  # Updated under the handler lock
+        self._debug_high_water = int(log_queue.maxsize * 0.8)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Freeze the message now; keep extras and exc_info for the formatter."""
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.overflow_policy == "block":
+            self.queue.put(record)
+            return
+        if record.levelno <= logging.DEBUG and self.queue.qsize() >= self._debug_high_water:
+            self.dropped_records += 1
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno >= logging.WARNING:
+                self.queue.put(record)
+            else:
+                self.dropped_records += 1
+
+
+# -------------------------------------------------------------------
+# Step 4: Logger setup — env-aware (core/logging/logger.py)
 # -------------------------------------------------------------------
 import sys
 
 from app.core.config import settings
 from app.core.context import trace_id_ctx
-from app.core.logging.logger_formatter import JsonFormatter
+from app.core.logging.logger_formatter import FastJsonFormatter
+from app.core.logging.logger_queue import BatchingQueueListener, BoundedQueueHandler
 
 
 class TraceIdFilter(logging.Filter):
@@ -117,6 +315,8 @@ def _setup_logger() -> logging.Logger:
 
     - local env  -> colored console output
     - other envs -> structured JSON to stdout
+    - log_queue.enabled -> records are handed to a background writer
+      thread instead of being written on the caller's (event loop) thread
     """
     log = logging.getLogger("my-service")
     log.setLevel(getattr(logging, settings.log_level, logging.INFO))
@@ -130,7 +330,14 @@ def _setup_logger() -> logging.Logger:
     if settings.env == "local":
         handler.setFormatter(ColoredConsoleFormatter())
     else:
-        handler.setFormatter(JsonFormatter())
+        handler.setFormatter(FastJsonFormatter())
+
+    if settings.log_queue.enabled:
+        log_queue: queue.Queue = queue.Queue(maxsize=settings.log_queue.max_size)
+        listener = BatchingQueueListener(log_queue, handler, settings.log_queue.batch_size)
+        listener.start()
+        handler = BoundedQueueHandler(log_queue, listener, settings.log_queue.overflow_policy)
+        handler.setLevel(getattr(logging, settings.log_level, logging.INFO))
 
     log.addHandler(handler)
     return log
@@ -141,77 +348,285 @@ logger = _setup_logger()
 
 
 # -------------------------------------------------------------------
-# Step 4: Request/response logging middleware (core/middleware/logging.py)
+# Step 5: Shutdown helper (core/logging/logger_util.py)
+# -------------------------------------------------------------------
+import sys
+
+from app.core.logging.logger import logger
+from app.core.logging.logger_queue import BoundedQueueHandler
+
+
+def shutdown_logger() -> None:
+    """Drain queued records before exit; call at the end of the lifespan."""
+    for handler in logger.handlers:
+        if isinstance(handler, BoundedQueueHandler):
+            handler.listener.stop()
+            if handler.dropped_records:
+                sys.stderr.write(f"log queue dropped {handler.dropped_records} records\n")
+        handler.flush()
+
+
+# -------------------------------------------------------------------
+# Step 6: Access-log sampling (core/logging/logger_sampling.py)
+# -------------------------------------------------------------------
+import time
+import zlib
+from typing import Final
+
+# Shortest span used to estimate the offered rate early in a window
+MIN_RATE_WINDOW_SECONDS: Final[float] = 0.1
+
+
+class AccessLogSampler:
+    """Decide which routine access-log lines are emitted.
+
+    - Per-route rates keyed by route template (``/users/{user_id}``),
+      falling back to ``default_rate``.
+    - Sampling is keyed on the trace id, so every service sampling the
+      same trace at the same rate makes the same decision.
+    - With ``max_lines_per_second`` the rates are scaled down, one-second
+      window at a time, so the expected output stays under the cap. Within
+      a window the scale also follows the rate offered so far, so a sudden
+      burst lowers the rate as it happens instead of only in the next
+      window; the cap stays as a hard ceiling behind that.
+
+    The effective rate (the probability this line had of being kept) is
+    returned so each line can carry ``sample_rate`` and downstream counts
+    can be re-weighted by ``1 / sample_rate``.
+    Always-keep rules (errors, slow, debug) live in the middleware.
+    """
+
+    def __init__(
+        self,
+        default_rate: float = 1.0,
+        route_rates: dict[str, float] | None = None,
+        max_lines_per_second: int | None = None,
+    ) -> None:
+        self.default_rate = default_rate
+        self.route_rates = route_rates or {}
+        self.max_lines_per_second = max_lines_per_second
+        self._scale = 1.0
+        self._window_start = time.monotonic()
+        self._window_expected = 0.0
+        self._window_emitted = 0
+
+    def _update_scale(self, now: float) -> None:
+        # Expected lines at unscaled rates in the last window -> next window's scale
+        if now - self._window_start >= 1.0:
+            expected = self._window_expected / (now - self._window_start)
+            self._scale = min(1.0, self.max_lines_per_second / expected) if expected else 1.0
+            self._window_start = now
+            self._window_expected = 0.0
+            self._window_emitted = 0
+
+    def _current_scale(self, now: float) -> float:
+        # Offered rate so far in this window; above the cap, scale down now
+        elapsed = max(now - self._window_start, MIN_RATE_WINDOW_SECONDS)
+        offered_per_second = self._window_expected / elapsed
+        if offered_per_second <= self.max_lines_per_second:
+            return self._scale
+        return min(self._scale, self.max_lines_per_second / offered_per_second)
+
+    def sample(self, route: str, trace_id: str) -> float | None:
+        """Return the sample rate if this request is logged, else ``None``."""
+        rate = self.route_rates.get(route, self.default_rate)
+        if self.max_lines_per_second is not None:
+            now = time.monotonic()
+            self._update_scale(now)
+            self._window_expected += rate
+            if self._window_emitted >= self.max_lines_per_second:
+                return None
+            rate *= self._current_scale(now)
+        if rate < 1.0 and zlib.crc32(trace_id.encode()) / 0xFFFFFFFF >= rate:
+            return None
+        self._window_emitted += 1
+        return min(rate, 1.0)
+
+
+# -------------------------------------------------------------------
+# Step 7: Request/response logging middleware (core/middleware/logging.py)
 # -------------------------------------------------------------------
 import time
 import uuid
 from typing import Final
 
-from fastapi import Request
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.context import trace_id_ctx
 from app.core.logging.logger import logger
+from app.core.logging.logger_sampling import AccessLogSampler
+from app.core.metrics.request_metrics import RequestMetrics
+from app.core.query_stats import QueryStats, query_stats_ctx
 
 SLOW_REQUEST_THRESHOLD_MS: Final[int] = 3000
 VERY_SLOW_REQUEST_THRESHOLD_MS: Final[int] = 5000
+DEFAULT_MAX_BODY_BYTES: Final[int] = 4096
 
+ERROR_STATUS_CODE: Final[int] = 500
+DEBUG_LOG_HEADER: Final[str] = "x-debug-log"
 
-async def set_logging(request: Request, call_next):
-    """Log every request with duration, method, status, and trace_id."""
-    # Propagate or generate trace_id
-    trace_id = request.headers.get("X-Trace-ID") or str(uuid.uuid4())
-    trace_id_ctx.set(trace_id)
-
-    # Skip noisy health-check paths
-    if request.url.path.endswith("/healthcheck"):
-        response = await call_next(request)
-        response.headers["X-Trace-ID"] = trace_id
-        return response
+# Only textual bodies are logged; binary uploads and multipart are skipped
+LOGGABLE_CONTENT_TYPES: Final[tuple[str, ...]] = (
+    "application/json",
+    "application/x-www-form-urlencoded",
+    "text/",
+)
 
-    start_time = time.time()
 
-    # Capture request body for mutating methods
-    request_body = None
-    if request.method in ("POST", "PUT", "PATCH"):
-        body_bytes = await request.body()
-        if body_bytes:
-            request_body = body_bytes.decode("utf-8")
+class LoggingMiddleware:
+    """Log every request with duration, method, status, and trace_id.
 
-            async def receive():
-                return {"type": "http.request", "body": body_bytes}
-            request._receive = receive      # re-inject consumed body
+    Pure ASGI (no ``BaseHTTPMiddleware``): the request body is observed
+    chunk by chunk as the app reads it, keeping at most ``max_body_bytes``,
+    so nothing is buffered or re-injected into ``receive``.
 
-    response = await call_next(request)
-
-    duration_ms = round((time.time() - start_time) * 1000)
-    log_extra: dict[str, str | int] = {
-        "path": request.url.path,
-        "method": request.method,
-        "status_code": response.status_code,
-        "duration_ms": duration_ms,
-    }
-    if request_body:
-        log_extra["content_str"] = request_body
-
-    # Warn on slow requests
-    if duration_ms > VERY_SLOW_REQUEST_THRESHOLD_MS:
-        logger.warning(f"[Middleware] VERY SLOW request (>{VERY_SLOW_REQUEST_THRESHOLD_MS}ms)", extra=log_extra)
-    elif duration_ms > SLOW_REQUEST_THRESHOLD_MS:
-        logger.warning(f"[Middleware] Slow request (>{SLOW_REQUEST_THRESHOLD_MS}ms)", extra=log_extra)
-    else:
-        logger.info("[Middleware] request processed", extra=log_extra)
+    With a ``sampler`` only a fraction of routine lines is emitted; 5xx,
+    slow requests and requests sending ``X-Debug-Log`` are always logged.
+    With ``metrics`` every request's latency feeds the route histograms.
+    Each line carries the request's SQL count and DB time; a probable N+1
+    is added as ``db_n_plus_one`` and the line is always kept.
+    """
 
-    response.headers["X-Trace-ID"] = trace_id
-    return response
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_body_bytes: int = DEFAULT_MAX_BODY_BYTES,
+        sampler: AccessLogSampler | None = None,
+        metrics: RequestMetrics | None = None,
+    ) -> None:
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+        self.sampler = sampler
+        self.metrics = metrics
+
+    def _sample_rate(
+        self,
+        route: str,
+        headers: Headers,
+        trace_id: str,
+        status_code: int,
+        duration_ms: int,
+        query_stats: QueryStats,
+    ) -> float | None:
+        """Return the rate this line is logged at, or ``None`` to skip it."""
+        always_keep = (
+            status_code >= ERROR_STATUS_CODE
+            or duration_ms > SLOW_REQUEST_THRESHOLD_MS
+            or DEBUG_LOG_HEADER in headers
+            or query_stats.n_plus_one is not None
+        )
+        if self.sampler is None or always_keep:
+            return 1.0
+        return self.sampler.sample(route, trace_id)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Propagate or generate trace_id
+        headers = Headers(scope=scope)
+        trace_id = headers.get("x-trace-id") or str(uuid.uuid4())
+        trace_id_ctx.set(trace_id)
+        query_stats = QueryStats(trace_id=trace_id)
+        query_stats_ctx.set(query_stats)
+
+        status_code = 500
+
+        async def send_with_trace_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("X-Trace-ID", trace_id)
+            await send(message)
+
+        # Skip noisy health-check and readiness-probe paths
+        if scope["path"].endswith(("/healthcheck", "/readyz")):
+            await self.app(scope, receive, send_with_trace_id)
+            return
+
+        # Capture (a prefix of) the request body for mutating methods
+        body = bytearray()
+        body_size = 0
+        content_type = headers.get("content-type", "")
+        if scope["method"] in ("POST", "PUT", "PATCH") and content_type.startswith(LOGGABLE_CONTENT_TYPES):
+            async def receive_and_capture() -> Message:
+                nonlocal body_size
+                message = await receive()
+                if message["type"] == "http.request":
+                    chunk = message.get("body", b"")
+                    body_size += len(chunk)
+                    if len(body) < self.max_body_bytes:
+                        body.extend(chunk[: self.max_body_bytes - len(body)])
+                return message
+        else:
+            receive_and_capture = receive
+
+        if self.metrics is not None:
+            self.metrics.in_flight += 1
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive_and_capture, send_with_trace_id)
+        finally:
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            duration_ms = round(elapsed_ms)
+            # FastAPI stores the matched route in the shared scope
+            route = getattr(scope.get("route"), "path", "<unmatched>")
+            if self.metrics is not None:
+                self.metrics.in_flight -= 1
+                self.metrics.observe(route, status_code, elapsed_ms)
+
+            sample_rate = self._sample_rate(
+                route, headers, trace_id, status_code, duration_ms, query_stats
+            )
+            if sample_rate is not None:
+                log_extra: dict[str, str | int | float | bool] = {
+                    "path": scope["path"],
+                    "method": scope["method"],
+                    "status_code": status_code,
+                    "duration_ms": duration_ms,
+                    "sample_rate": sample_rate,
+                    "db_queries": query_stats.count,
+                    "db_time_ms": round(query_stats.total_ms, 1),
+                }
+                if query_stats.n_plus_one is not None:
+                    log_extra["db_n_plus_one"] = query_stats.n_plus_one
+                if body:
+                    log_extra["content_str"] = body.decode("utf-8", errors="replace")
+                    if body_size > len(body):
+                        log_extra["content_truncated"] = True
+
+                # Warn on slow requests
+                if duration_ms > VERY_SLOW_REQUEST_THRESHOLD_MS:
+                    logger.warning(f"[Middleware] VERY SLOW request (>{VERY_SLOW_REQUEST_THRESHOLD_MS}ms)", extra=log_extra)
+                elif duration_ms > SLOW_REQUEST_THRESHOLD_MS:
+                    logger.warning(f"[Middleware] Slow request (>{SLOW_REQUEST_THRESHOLD_MS}ms)", extra=log_extra)
+                else:
+                    logger.info("[Middleware] request processed", extra=log_extra)
 
 
 # -------------------------------------------------------------------
-# Step 5: Register middleware in app factory (main.py)
+# Step 8: Register middleware in app factory (main.py)
 # -------------------------------------------------------------------
-# from starlette.middleware.base import BaseHTTPMiddleware
-# from app.core.middleware.logging import set_logging
+# from app.core.config import settings
+# from app.core.logging.logger_sampling import AccessLogSampler
+# from app.core.metrics.request_metrics import request_metrics
+# from app.core.middleware.logging import LoggingMiddleware
 #
 # def create_app() -> FastAPI:
 #     app = FastAPI(title="My Service", lifespan=lifespan)
-#     app.add_middleware(BaseHTTPMiddleware, dispatch=set_logging)
+#     sampler = AccessLogSampler(
+#         default_rate=settings.access_log.sample_rate,
+#         route_rates=settings.access_log.route_sample_rates,
+#         max_lines_per_second=settings.access_log.max_lines_per_second,
+#     )
+#     app.add_middleware(
+#         LoggingMiddleware, max_body_bytes=4096, sampler=sampler, metrics=request_metrics
+#     )
 #     return app
+#
+# @asynccontextmanager
+# async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+#     yield
+#     shutdown_logger()     # Flush the queued pipeline on shutdown
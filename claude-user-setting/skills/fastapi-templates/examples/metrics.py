@@ -0,0 +1,163 @@
+# Pattern 8: In-Process Metrics (Prometheus text format)
+# - Fixed-memory, HDR-style latency histograms per route template + status class
+# - In-flight request gauge, fed from the logging middleware
+# - /metrics route registered in the app factory, extensible via collectors
+#
+# Directory structure:
+#   app/core/metrics/
+#   ├── histogram.py        # LatencyHistogram (log-linear buckets)
+#   ├── request_metrics.py  # Per-route histograms + in-flight gauge
+#   └── endpoint.py         # Prometheus text exposition
+
+# -------------------------------------------------------------------
+# Step 1: Latency histogram (core/metrics/histogram.py)
+# -------------------------------------------------------------------
+from bisect import bisect_left
+from typing import Final
+
+SUB_BUCKETS: Final[int] = 4         # Linear steps per power of two (<= 25% bucket width)
+MIN_EXPONENT: Final[int] = -2       # First bucket bound: 0.25 ms
+MAX_EXPONENT: Final[int] = 17       # Last bucket bound: ~115 s
+
+
+def _hdr_bounds() -> tuple[float, ...]:
+    """Log-linear bucket upper bounds in milliseconds (HDR-style)."""
+    return tuple(
+        2.0 ** exponent * (1 + step / SUB_BUCKETS)
+        for exponent in range(MIN_EXPONENT, MAX_EXPONENT)
+        for step in range(SUB_BUCKETS)
+    )
+
+
+BUCKET_BOUNDS_MS: Final[tuple[float, ...]] = _hdr_bounds()
+
+
+class LatencyHistogram:
+    """Fixed-size latency histogram with log-linear buckets.
+
+    Memory is one int per bucket regardless of traffic. ``observe`` is a
+    bisect plus two additions and takes no lock: it is only called from
+    the event loop thread, and scrapes tolerate a slightly torn read.
+    """
+
+    __slots__ = ("counts", "sum_ms", "count")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)  # Last slot: +Inf
+        self.sum_ms = 0.0
+        self.count = 0
+
+    def observe(self, value_ms: float) -> None:
+        self.counts[bisect_left(BUCKET_BOUNDS_MS, value_ms)] += 1
+        self.sum_ms += value_ms
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound (ms) of the bucket holding the ``q`` quantile."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return BUCKET_BOUNDS_MS[min(index, len(BUCKET_BOUNDS_MS) - 1)]
+        return BUCKET_BOUNDS_MS[-1]
+
+
+def histogram_lines(name: str, labels: str, histogram: LatencyHistogram) -> list[str]:
+    """Prometheus ``_bucket``/``_sum``/``_count`` lines (seconds) for one histogram."""
+    lines = []
+    cumulative = 0
+    for bound_ms, bucket_count in zip(BUCKET_BOUNDS_MS, histogram.counts):
+        cumulative += bucket_count
+        lines.append(f'{name}_bucket{{{labels},le="{bound_ms / 1000:g}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram.sum_ms / 1000:.6f}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+# -------------------------------------------------------------------
+# Step 2: Request metrics (core/metrics/request_metrics.py)
+# -------------------------------------------------------------------
+from app.core.metrics.histogram import LatencyHistogram, histogram_lines
+
+
+class RequestMetrics:
+    """Latency histograms keyed by (route template, status class) plus in-flight gauge.
+
+    Route templates (``/users/{user_id}``) keep label cardinality bounded
+    by the number of routes, not by the number of distinct URLs.
+    """
+
+    def __init__(self) -> None:
+        self.histograms: dict[tuple[str, str], LatencyHistogram] = {}
+        self.in_flight = 0
+
+    def observe(self, route: str, status_code: int, duration_ms: float) -> None:
+        key = (route, f"{status_code // 100}xx")
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram()
+        histogram.observe(duration_ms)
+
+    def render(self) -> list[str]:
+        """Prometheus text lines for all request metrics."""
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_request_duration_seconds Request latency by route and status class.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (route, status), histogram in sorted(self.histograms.items()):
+            lines += histogram_lines(
+                "http_request_duration_seconds", f'route="{route}",status="{status}"', histogram
+            )
+        return lines
+
+
+# Module-level singleton
+request_metrics = RequestMetrics()
+
+
+# -------------------------------------------------------------------
+# Step 3: Prometheus endpoint (core/metrics/endpoint.py)
+# -------------------------------------------------------------------
+from typing import Callable, Final
+
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+from app.core.metrics.request_metrics import request_metrics
+
+PROMETHEUS_CONTENT_TYPE: Final[str] = "text/plain; version=0.0.4; charset=utf-8"
+
+# Each collector returns Prometheus text lines; other modules add their own
+_collectors: list[Callable[[], list[str]]] = [request_metrics.render]
+
+
+def register_collector(collector: Callable[[], list[str]]) -> None:
+    """Add a source of metric lines (e.g. DB pool gauges) to ``/metrics``."""
+    _collectors.append(collector)
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """Expose in-process metrics in the Prometheus text format."""
+    lines = [line for collector in _collectors for line in collector()]
+    return PlainTextResponse("\n".join(lines) + "\n", media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+# -------------------------------------------------------------------
+# Step 4: Register in app factory (main.py)
+# -------------------------------------------------------------------
+# from app.core.metrics.endpoint import metrics_endpoint
+# from app.core.metrics.request_metrics import request_metrics
+# from app.core.middleware.logging import LoggingMiddleware
+#
+# def create_app() -> FastAPI:
+#     app = FastAPI(title="My Service", lifespan=lifespan)
+#     app.add_middleware(LoggingMiddleware, metrics=request_metrics)
+#     app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+#     return app
@@ -1,40 +1,103 @@
 # Pattern 3: Service Layer
 # - Business logic separated from routes and repositories
 # - Password hashing, validation, orchestration
+# - Background rehash of outdated password hashes after login
 
 # -------------------------------------------------------------------
 # services/user_service.py
 # -------------------------------------------------------------------
-from typing import Optional
+import asyncio
+import logging
+from typing import List, Optional, Set
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import AsyncSessionLocal
 from app.repositories.user_repository import user_repository
 from app.schemas.user import UserCreate, UserUpdate, User
-from app.core.security import get_password_hash, verify_password
+from app.core.security import (
+    HashingPoolSaturated,
+    get_password_hash_async,
+    password_hash_pool,
+    password_needs_rehash,
+    verify_password_async,
+)
+
+logger = logging.getLogger(__name__)
+
+# Postgres default names for `unique=True` / `unique=True, index=True` on users.email
+EMAIL_UNIQUE_CONSTRAINTS = {"users_email_key", "ix_users_email"}
+
+def _is_email_conflict(error: IntegrityError) -> bool:
+    """True if the unique constraint on users.email rejected the write.
+
+    NOT NULL or CHECK failures on the same column are not conflicts.
+    """
+    orig = error.orig
+    # psycopg exposes diag; SQLAlchemy's asyncpg adapter chains the driver error
+    constraint = getattr(getattr(orig, "diag", None), "constraint_name", None) or getattr(
+        orig.__cause__, "constraint_name", None
+    )
+    if constraint is not None:
+        return constraint in EMAIL_UNIQUE_CONSTRAINTS
+    # SQLite has no constraint name, only the column list
+    return str(orig) == "UNIQUE constraint failed: users.email"
 
 class UserService:
     """Business logic for users."""
 
     def __init__(self):
         self.repository = user_repository
+        self._background_tasks: Set[asyncio.Task] = set()
 
     async def create_user(
         self,
         db: AsyncSession,
         user_in: UserCreate
     ) -> User:
-        """Create new user with hashed password."""
-        # Check if email exists
-        existing = await self.repository.get_by_email(db, user_in.email)
-        if existing:
-            raise ValueError("Email already registered")
+        """Create new user with hashed password.
 
-        # Hash password
+        The unique index on ``email`` is the source of truth: one INSERT,
+        no pre-check query, and no race between concurrent signups.
+        """
         user_in_dict = user_in.dict()
-        user_in_dict["hashed_password"] = get_password_hash(user_in_dict.pop("password"))
+        user_in_dict["hashed_password"] = await get_password_hash_async(
+            user_in_dict.pop("password")
+        )
+        try:
+            return await self.repository.create(db, user_in_dict)
+        except IntegrityError as e:
+            if _is_email_conflict(e):
+                raise ValueError("Email already registered") from e
+            raise
 
-        # Create user
-        user = await self.repository.create(db, UserCreate(**user_in_dict))
-        return user
+    async def create_users(
+        self,
+        db: AsyncSession,
+        users_in: List[UserCreate]
+    ) -> List[User]:
+        """Create many users: concurrent hashing, then chunked multi-row inserts."""
+        emails = [user_in.email for user_in in users_in]
+        if len(set(emails)) != len(emails):
+            raise ValueError("Duplicate email in request")
+
+        # One window per pool width keeps the queue free for logins/signups
+        window = password_hash_pool.max_workers
+        to_create = []
+        for start in range(0, len(users_in), window):
+            batch = [user_in.dict() for user_in in users_in[start:start + window]]
+            hashes = await asyncio.gather(
+                *(get_password_hash_async(row.pop("password")) for row in batch)
+            )
+            for row, hashed_password in zip(batch, hashes):
+                row["hashed_password"] = hashed_password
+            to_create.extend(batch)
+
+        try:
+            return await self.repository.create_many(db, to_create)
+        except IntegrityError as e:
+            if _is_email_conflict(e):
+                raise ValueError("Email already registered") from e
+            raise
 
     async def authenticate(
         self,
@@ -46,28 +109,52 @@ class UserService:
         user = await self.repository.get_by_email(db, email)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        if not await verify_password_async(password, user.hashed_password):
             return None
+        if password_needs_rehash(user.hashed_password):
+            task = asyncio.create_task(
+                self._rehash_password(user.id, user.hashed_password, password)
+            )
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
         return user
 
+    async def _rehash_password(
+        self,
+        user_id: int,
+        old_hash: str,
+        password: str
+    ) -> None:
+        """Upgrade an outdated hash off the login path, in its own session."""
+        try:
+            new_hash = await get_password_hash_async(password)
+            async with AsyncSessionLocal() as db:
+                await self.repository.replace_password_hash(db, user_id, old_hash, new_hash)
+                await db.commit()
+        except HashingPoolSaturated:
+            pass  # Low priority: retried on the next successful login
+        except Exception:
+            logger.exception("Password rehash failed for user %s", user_id)
+
     async def update_user(
         self,
         db: AsyncSession,
         user_id: int,
         user_in: UserUpdate
     ) -> Optional[User]:
-        """Update user."""
-        user = await self.repository.get(db, user_id)
-        if not user:
-            return None
-
-        if user_in.password:
-            user_in_dict = user_in.dict(exclude_unset=True)
-            user_in_dict["hashed_password"] = get_password_hash(
-                user_in_dict.pop("password")
+        """Update user (one UPDATE ... RETURNING, no prior fetch)."""
+        values = user_in.dict(exclude_unset=True)
+        if values.get("password"):
+            values["hashed_password"] = await get_password_hash_async(
+                values.pop("password")
             )
-            user_in = UserUpdate(**user_in_dict)
+        values.pop("password", None)
+
+        # The repository also revokes cached principals holding the old row
+        return await self.repository.update_by_id(db, user_id, values)
 
-        return await self.repository.update(db, user, user_in)
+    async def delete_user(self, db: AsyncSession, user_id: int) -> bool:
+        """Delete user and revoke their cached tokens (via the repository)."""
+        return await self.repository.delete_by_id(db, user_id)
 
 user_service = UserService()
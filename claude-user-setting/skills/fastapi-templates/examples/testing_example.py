@@ -1,21 +1,63 @@
 # Testing: Async test setup with pytest
 # - In-memory SQLite for isolated tests
 # - Dependency override for database session
-# - AsyncClient for integration testing
+# - AsyncClient over ASGITransport for integration testing
+# - Shared helpers (tests/support.py), reused by benchmarks/bench_endpoints.py
+# - Local stand-in server for outbound HTTP clients (no real upstream)
+
+# -------------------------------------------------------------------
+# tests/support.py
+# -------------------------------------------------------------------
+import httpx
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.core.database import Base
+from app.core.security import create_access_token
+
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+async def create_schema(engine: AsyncEngine) -> None:
+    """Create every table on ``engine``."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+async def create_test_engine(url: str = TEST_DATABASE_URL, echo: bool = False) -> AsyncEngine:
+    """Engine with the schema already created."""
+    engine = create_async_engine(url, echo=echo)
+    await create_schema(engine)
+    return engine
+
+def make_client(app: FastAPI) -> httpx.AsyncClient:
+    """Client that calls the ASGI app in-process (no sockets, no lifespan)."""
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+def user_payload(index: int, prefix: str = "user") -> dict:
+    """Valid ``UserCreate`` body with a unique email per ``(prefix, index)``."""
+    return {
+        "email": f"{prefix}-{index}@example.com",
+        "password": "testpass123",
+        "name": f"User {index}",
+    }
+
+def auth_headers(user_id: int) -> dict:
+    """Bearer header for ``user_id``, minted directly instead of via login."""
+    token = create_access_token({"sub": str(user_id)})
+    return {"Authorization": f"Bearer {token}"}
+
 
 # -------------------------------------------------------------------
 # tests/conftest.py
 # -------------------------------------------------------------------
 import pytest
 import asyncio
-from httpx import AsyncClient
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from app.main import app
-from app.core.database import get_db, Base
-
-TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+from app.core.database import get_db, get_read_db
+from tests.support import create_test_engine, make_client
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -25,9 +67,7 @@ def event_loop():
 
 @pytest.fixture
 async def db_session():
-    engine = create_async_engine(TEST_DATABASE_URL, echo=True)
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    engine = await create_test_engine(echo=True)
 
     AsyncSessionLocal = sessionmaker(
         engine, class_=AsyncSession, expire_on_commit=False
@@ -42,9 +82,11 @@ async def client(db_session):
         yield db_session
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
 
-    async with AsyncClient(app=app, base_url="http://test") as client:
+    async with make_client(app) as client:
         yield client
+    app.dependency_overrides.clear()
 
 
 # -------------------------------------------------------------------
@@ -66,3 +108,153 @@ async def test_create_user(client):
     data = response.json()
     assert data["email"] == "test@example.com"
     assert "id" in data
+
+
+# -------------------------------------------------------------------
+# tests/test_embedding_client.py
+# -------------------------------------------------------------------
+import asyncio
+import struct
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+
+from app.core.config.config import EmbeddingConfig
+from app.infra.client.embedding_cache import CachedEmbeddingClient
+from app.infra.client.embedding_client import EmbeddingClient
+from app.infra.client.vector_store import DiskVectorStore
+
+def fake_vector(text: str) -> list:
+    return [float(len(text)), float(sum(map(ord, text)))]
+
+def make_stand_in_server() -> FastAPI:
+    """Local stand-in for the embedding API that records every request."""
+    server = FastAPI()
+    server.state.requests = []
+
+    @server.post("/embed")
+    async def embed(payload: dict):
+        server.state.requests.append(payload["texts"])
+        await asyncio.sleep(0.005)  # Upstream latency, so concurrent callers overlap
+        if "fail" in payload["texts"]:
+            raise HTTPException(status_code=503)
+        return {"embeddings": [fake_vector(text) for text in payload["texts"]]}
+
+    return server
+
+@pytest.fixture
+async def stand_in():
+    server = make_stand_in_server()
+    transport = httpx.ASGITransport(app=server)
+    async with httpx.AsyncClient(transport=transport, base_url="http://embedding") as http_client:
+        yield server, http_client
+
+@pytest.mark.asyncio
+async def test_concurrent_embeds_share_upstream_requests(stand_in):
+    server, http_client = stand_in
+    client = EmbeddingClient(http_client, EmbeddingConfig(batch_max_size=32))
+    texts = [f"text-{i}" for i in range(320)]
+
+    vectors = await asyncio.gather(*(client.embed(text) for text in texts))
+
+    assert vectors == [fake_vector(text) for text in texts]
+    assert len(server.state.requests) == 10  # 320 calls -> 10 upstream requests
+
+@pytest.mark.asyncio
+async def test_repeated_texts_are_sent_once(stand_in):
+    server, http_client = stand_in
+    client = EmbeddingClient(http_client, EmbeddingConfig())
+
+    vectors = await asyncio.gather(*(client.embed("same") for _ in range(5)))
+
+    assert vectors == [fake_vector("same")] * 5
+    assert server.state.requests == [["same"]]
+
+@pytest.mark.asyncio
+async def test_failed_batch_fails_every_caller(stand_in):
+    _, http_client = stand_in
+    client = EmbeddingClient(http_client, EmbeddingConfig())
+
+    results = await asyncio.gather(
+        client.embed("ok"), client.embed("fail"), return_exceptions=True
+    )
+
+    assert all(isinstance(result, httpx.HTTPStatusError) for result in results)
+
+@pytest.mark.asyncio
+async def test_batching_disabled_sends_one_request_per_call(stand_in):
+    server, http_client = stand_in
+    client = EmbeddingClient(http_client, EmbeddingConfig(batch_enabled=False))
+
+    await asyncio.gather(*(client.embed(f"text-{i}") for i in range(3)))
+
+    assert len(server.state.requests) == 3
+
+@pytest.mark.asyncio
+async def test_cache_misses_still_share_upstream_requests(stand_in):
+    server, http_client = stand_in
+    config = EmbeddingConfig(batch_max_size=64)
+    cached = CachedEmbeddingClient(EmbeddingClient(http_client, config), config)
+    texts = [f"text-{i}" for i in range(100)]
+
+    vectors = await asyncio.gather(*(cached.embed(text) for text in texts))
+
+    assert vectors == [fake_vector(text) for text in texts]
+    assert len(server.state.requests) == 2  # Same as without the cache
+    assert cached.stats.misses == 100
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_fetch(stand_in):
+    server, http_client = stand_in
+    config = EmbeddingConfig()
+    cached = CachedEmbeddingClient(EmbeddingClient(http_client, config), config)
+
+    await asyncio.gather(*(cached.embed("same") for _ in range(5)))
+    assert await cached.embed("same") == fake_vector("same")
+
+    assert server.state.requests == [["same"]]
+    assert (cached.stats.misses, cached.stats.coalesced, cached.stats.memory_hits) == (1, 4, 1)
+
+@pytest.mark.asyncio
+async def test_cancelled_owner_does_not_strand_joiners(stand_in):
+    _, http_client = stand_in
+    config = EmbeddingConfig()
+    cached = CachedEmbeddingClient(EmbeddingClient(http_client, config), config)
+
+    owner = asyncio.create_task(cached.embed("shared"))
+    await asyncio.sleep(0)  # Owner starts the fetch
+    joiner = asyncio.create_task(cached.embed("shared"))
+    await asyncio.sleep(0)  # Joiner waits on it
+    owner.cancel()
+
+    assert await asyncio.wait_for(joiner, timeout=1) == fake_vector("shared")
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_restart(stand_in, tmp_path):
+    server, http_client = stand_in
+    config = EmbeddingConfig(cache_dir=str(tmp_path), dimension=2)
+    cached = CachedEmbeddingClient(EmbeddingClient(http_client, config), config)
+    await cached.embed_many(["a", "bb"])
+    await cached.aclose()
+
+    restarted = CachedEmbeddingClient(EmbeddingClient(http_client, config), config)
+
+    assert await restarted.embed_many(["bb", "a"]) == [fake_vector("bb"), fake_vector("a")]
+    assert restarted.stats.disk_hits == 2
+    assert len(server.state.requests) == 1
+
+def test_disk_store_drops_rows_orphaned_by_a_crash(tmp_path):
+    store = DiskVectorStore(tmp_path, dimension=2)
+    store.put(b"k" * 32, [1.0, 2.0])
+    store._data.write(struct.pack("<2f", 9.0, 9.0) + b"\x00")  # Crash after row, before key
+    store._data.flush()
+    store.close()
+
+    reopened = DiskVectorStore(tmp_path, dimension=2)
+    reopened.put(b"x" * 32, [3.0, 4.0])
+    reopened.close()
+
+    restarted = DiskVectorStore(tmp_path, dimension=2)
+    assert restarted.get(b"k" * 32) == [1.0, 2.0]
+    assert restarted.get(b"x" * 32) == [3.0, 4.0]